@@ -1,77 +1,217 @@
-from flask import Flask, request, jsonify, send_file, render_template
+from flask import Flask, request, send_file, render_template, Response, stream_with_context
 from flask_cors import CORS
+from flask_compress import Compress
 import pandas as pd
 import sqlite3
 from datetime import datetime, timedelta
 import os
-import json
-import uuid
-import numpy as np
+import orjson
+import io
+import xlsxwriter
 import time
 import threading
+import queue
+import atexit
+import logging
+import logging.handlers
 from contextlib import contextmanager
+from itertools import chain
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*", "allow_headers": "*", "methods": "*"}})
 
+# Compress JSON responses over 1KB (brotli when the client accepts it);
+# streamed downloads are compressed chunk by chunk as they are generated
+app.config.update(
+    COMPRESS_MIMETYPES=['application/json', 'text/html'],
+    COMPRESS_LEVEL=5,
+    COMPRESS_MIN_SIZE=1024,
+    COMPRESS_ALGORITHM=['br', 'gzip', 'deflate'],
+)
+Compress(app)
+
 DB_FILE = 'vocabulary.db'
-EXCEL_FILE = 'vocabulary_all.xlsx'
-UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
+_ALLOWED_SUFFIXES = ('.xlsx', '.xls')
 
-# Database lock for thread safety
-db_lock = threading.RLock()
+# Logging goes through a queue so handler I/O happens off the request thread
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_records = queue.Queue(-1)
+logger.addHandler(logging.handlers.QueueHandler(_log_records))
+_log_listener = logging.handlers.QueueListener(_log_records, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
-# Create uploads folder if it doesn't exist
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
+# Connection pool - connections are opened once and reused across requests.
+# LIFO hands out the most recently used connection, whose page cache is warmest
+POOL_SIZE = max(4, os.cpu_count() or 1)
+_pool = queue.LifoQueue(maxsize=POOL_SIZE)
+_pool_lock = threading.Lock()
+_pool_ready = False
 
-@contextmanager
-def get_db_connection():
-    """Context manager for database connections with timeout and retry"""
-    conn = None
+# In-process analytics cache (5 minute TTL)
+ANALYTICS_TTL = 300
+_ANALYTICS_CACHE = {"data": None, "ts": 0.0, "generation": 0}
+_ANALYTICS_LOCK = threading.Lock()
+
+def invalidate_analytics_cache():
+    """Drop the cached analytics; call once the write has committed.
+
+    Bumping the generation also stops a reader that queried before the commit
+    from storing its now-stale result.
+    """
+    with _ANALYTICS_LOCK:
+        _ANALYTICS_CACHE["data"] = None
+        _ANALYTICS_CACHE["generation"] += 1
+
+def _open_connection():
+    """Open a pooled connection and apply the per-connection PRAGMAs once"""
     retries = 3
     for attempt in range(retries):
         try:
             conn = sqlite3.connect(
-                DB_FILE, 
+                DB_FILE,
                 timeout=30,
-                check_same_thread=False
+                check_same_thread=False,
+                cached_statements=256
             )
-            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
             conn.execute('PRAGMA busy_timeout=5000')
+            conn.execute('PRAGMA wal_autocheckpoint=2000')
+            conn.execute('PRAGMA journal_size_limit=67108864')
+            conn.execute('PRAGMA cache_size=-65536')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            conn.execute('PRAGMA mmap_size=268435456')
+            # The words stats triggers are created by server.py's init_db on the shared
+            # vocabulary.db; REPLACE conflict deletes made here must fire them too
+            conn.execute('PRAGMA recursive_triggers=ON')
             conn.row_factory = sqlite3.Row
-            yield conn
-            break
+            return conn
         except sqlite3.OperationalError as e:
             if "locked" in str(e) and attempt < retries - 1:
                 time.sleep(0.1 * (attempt + 1))
                 continue
-            else:
-                raise e
-        finally:
-            if conn:
-                conn.close()
+            raise e
+
+def _fill_pool():
+    """Open the pool on first use so importing the module stays cheap"""
+    global _pool_ready
+    with _pool_lock:
+        if not _pool_ready:
+            for _ in range(POOL_SIZE):
+                _pool.put(_open_connection())
+            _pool_ready = True
 
 @contextmanager
-def get_db_cursor():
-    """Context manager for database operations with thread safety"""
-    with db_lock:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
+def get_db_connection():
+    """Borrow a connection from the pool and return it when done"""
+    if not _pool_ready:
+        _fill_pool()
+    conn = _pool.get()
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+        _pool.put(conn)
+
+def _begin_immediate(conn, retries=5):
+    """Take the write lock up front, backing off while another writer holds it"""
+    for attempt in range(retries):
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            return
+        except sqlite3.OperationalError as e:
+            if "locked" in str(e) and attempt < retries - 1:
+                time.sleep(0.05 * (2 ** attempt))
+                continue
+            raise e
+
+@contextmanager
+def get_db_cursor(write=False):
+    """Context manager for database operations"""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if write:
+            _begin_immediate(conn)
+        try:
+            yield cursor, conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            raise e
+
+# Background sync_log writer - log rows are queued and flushed in batches
+SYNC_LOG_INSERT_SQL = '''
+    INSERT INTO sync_log (device_id, action, details, timestamp)
+    VALUES (?, ?, ?, ?)
+'''
+SYNC_LOG_BATCH = 500
+SYNC_LOG_INTERVAL = 0.1
+_sync_log_queue = queue.Queue()
+_sync_log_lock = threading.Lock()
+_sync_log_thread = None
+
+def _flush_sync_log(batch):
+    try:
+        with get_db_cursor(write=True) as (c, conn):
+            c.executemany(SYNC_LOG_INSERT_SQL, batch)
+    except Exception as e:
+        logger.error("❌ Error writing sync log: %s", e)
+
+def _sync_log_writer():
+    """Drain the sync_log queue, writing up to SYNC_LOG_BATCH rows per transaction"""
+    while True:
+        batch = [_sync_log_queue.get()]
+        deadline = time.monotonic() + SYNC_LOG_INTERVAL
+        while len(batch) < SYNC_LOG_BATCH:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
             try:
-                yield cursor, conn
-                conn.commit()
-            except Exception as e:
-                conn.rollback()
-                raise e
+                batch.append(_sync_log_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        _flush_sync_log(batch)
+
+def log_sync(device_id, action, details):
+    """Queue a sync_log row without blocking the request"""
+    global _sync_log_thread
+    if _sync_log_thread is None:
+        with _sync_log_lock:
+            if _sync_log_thread is None:
+                _sync_log_thread = threading.Thread(target=_sync_log_writer, daemon=True)
+                _sync_log_thread.start()
+    # Same format as SQLite's CURRENT_TIMESTAMP so queued rows match the column default
+    _sync_log_queue.put((device_id, action, details, time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime())))
+
+@atexit.register
+def _drain_sync_log():
+    batch = []
+    while True:
+        try:
+            batch.append(_sync_log_queue.get_nowait())
+        except queue.Empty:
+            break
+    if batch:
+        _flush_sync_log(batch)
+
+def ojsonify(obj, status=200):
+    """Serialize a response body with orjson"""
+    return Response(orjson.dumps(obj), status=status, mimetype='application/json')
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith(_ALLOWED_SUFFIXES)
 
 def init_db():
     """Initialize database with proper table creation"""
-    with get_db_cursor() as (c, conn):
+    # journal_mode is persistent on the database file, so set it once here
+    with get_db_connection() as conn:
+        conn.execute('PRAGMA journal_mode=WAL')
+    
+    # All schema setup runs in a single transaction
+    with get_db_cursor(write=True) as (c, conn):
         # Words table
         c.execute('''
             CREATE TABLE IF NOT EXISTS words (
@@ -99,6 +239,33 @@ def init_db():
         except:
             pass
         
+        # Partial/composite indexes for the active-word queries
+        c.execute("CREATE INDEX IF NOT EXISTS idx_words_active_cat ON words (category) WHERE is_deleted = 0")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_words_active_date ON words (date_added) WHERE is_deleted = 0")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_words_device_active ON words (device_id, is_deleted)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_words_dev_word_live ON words (device_id, word) WHERE is_deleted = 0")
+        
+        # Devices and sync log tables (same schema as the standalone server)
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS devices (
+                device_id TEXT PRIMARY KEY,
+                device_name TEXT,
+                last_sync TIMESTAMP,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_ip TEXT
+            )
+        ''')
+        
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS sync_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                device_id TEXT,
+                action TEXT,
+                timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                details TEXT
+            )
+        ''')
+        
         # Categories table
         c.execute('''
             CREATE TABLE IF NOT EXISTS categories (
@@ -118,11 +285,13 @@ def init_db():
             ('Technical Terms', '#3b82f6', 1)
         ]
         
-        for name, color, is_default in default_categories:
-            c.execute('''
+        # Only seed an empty table - default categories can't be deleted
+        c.execute('SELECT 1 FROM categories LIMIT 1')
+        if c.fetchone() is None:
+            c.executemany('''
                 INSERT OR IGNORE INTO categories (name, color, is_default)
                 VALUES (?, ?, ?)
-            ''', (name, color, is_default))
+            ''', default_categories)
         
         # Quiz tables
         c.execute('''
@@ -141,6 +310,8 @@ def init_db():
             )
         ''')
         
+        c.execute("CREATE INDEX IF NOT EXISTS idx_quiz_results_device_ts ON quiz_results (device_id, timestamp DESC)")
+        
         c.execute('''
             CREATE TABLE IF NOT EXISTS quiz_statistics (
                 device_id TEXT PRIMARY KEY,
@@ -155,6 +326,38 @@ def init_db():
             )
         ''')
         
+        # Quizzes per device per day (same table and trigger as the standalone
+        # server, so both apps count every quiz); rebuilt from quiz_results
+        # whenever the trigger is first installed
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS quiz_daily_counters (
+                device_id TEXT,
+                quiz_date TEXT,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (device_id, quiz_date)
+            )
+        ''')
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_quiz_daily_count'")
+        if c.fetchone() is None:
+            c.execute('DELETE FROM quiz_daily_counters')
+            c.execute('''
+                INSERT INTO quiz_daily_counters (device_id, quiz_date, count)
+                SELECT device_id, DATE(timestamp), COUNT(*) 
+                FROM quiz_results 
+                WHERE timestamp IS NOT NULL
+                GROUP BY device_id, DATE(timestamp)
+            ''')
+            c.execute('''
+                CREATE TRIGGER trg_quiz_daily_count
+                AFTER INSERT ON quiz_results
+                WHEN NEW.timestamp IS NOT NULL
+                BEGIN
+                    INSERT INTO quiz_daily_counters (device_id, quiz_date, count)
+                    VALUES (NEW.device_id, DATE(NEW.timestamp), 1)
+                    ON CONFLICT(device_id, quiz_date) DO UPDATE SET count = count + 1;
+                END
+            ''')
+        
         # Analytics cache table
         c.execute('''
             CREATE TABLE IF NOT EXISTS analytics_cache (
@@ -179,13 +382,22 @@ def init_db():
         
         c.execute('PRAGMA optimize')
     
-    print("✅ Database initialized with all tables")
+    logger.info("✅ Database initialized with all tables")
 
 # Routes
 @app.route('/')
 def home():
     return render_template('index.html')
 
+STATUS_COUNTS_SQL = '''
+    SELECT
+        (SELECT COUNT(*) FROM words WHERE is_deleted = 0),
+        (SELECT COUNT(DISTINCT category) FROM words WHERE is_deleted = 0),
+        (SELECT COUNT(DISTINCT device_id) FROM words WHERE is_deleted = 0),
+        (SELECT COUNT(*) FROM words
+         WHERE date_added >= ? AND date_added < ? AND is_deleted = 0)
+'''
+
 @app.route('/api/status', methods=['GET', 'OPTIONS'])
 def get_status():
     if request.method == 'OPTIONS':
@@ -193,38 +405,32 @@ def get_status():
     
     try:
         with get_db_cursor() as (c, conn):
-            c.execute("SELECT COUNT(*) FROM words WHERE is_deleted = 0")
-            total_words = c.fetchone()[0]
-            
-            c.execute("SELECT COUNT(DISTINCT category) FROM words WHERE is_deleted = 0")
-            category_count = c.fetchone()[0]
-            
-            c.execute("SELECT COUNT(DISTINCT device_id) FROM devices")
-            device_count = c.fetchone()[0] if c.fetchone() else 0
-            
-            # Get today's activity
-            today = datetime.now().strftime('%Y-%m-%d')
-            c.execute("SELECT COUNT(*) FROM words WHERE DATE(date_added) = ? AND is_deleted = 0", (today,))
-            words_today = c.fetchone()[0]
-            
-            return jsonify({
+            # Get all counts in one round-trip; today's activity uses a range so the index applies
+            now = datetime.now()
+            today = now.strftime('%Y-%m-%d')
+            tomorrow = (now + timedelta(days=1)).strftime('%Y-%m-%d')
+            c.execute(STATUS_COUNTS_SQL, (today, tomorrow))
+            total_words, category_count, device_count, words_today = c.fetchone()
+            
+            return ojsonify({
                 "status": "online",
                 "total_words": total_words,
                 "category_count": category_count,
                 "device_count": device_count,
                 "words_today": words_today,
-                "server_time": datetime.now().isoformat()
+                "server_time": now.isoformat()
             })
             
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)})
+        return ojsonify({"status": "error", "message": str(e)})
 
 @app.route('/api/download_all', methods=['GET', 'OPTIONS'])
 def download_all_words():
     if request.method == 'OPTIONS':
         return '', 200
     
-    try:
+    def generate():
+        # Stream rows in chunks so the full table is never held in memory
         with get_db_cursor() as (c, conn):
             c.execute('''
                 SELECT id, word, meaning_bangla, meaning_english, synonyms, 
@@ -233,18 +439,36 @@ def download_all_words():
                 WHERE is_deleted = 0 
                 ORDER BY date_added DESC
             ''')
-            words = []
-            columns = [column[0] for column in c.description]
-            for row in c.fetchall():
-                words.append(dict(zip(columns, row)))
-            
-            return jsonify({
-                "status": "success",
-                "words": words,
-                "count": len(words)
-            })
+            rows = c.fetchmany(1000)
+            yield b'{"status":"success","words":['
+            count = 0
+            while rows:
+                chunk = b','.join(orjson.dumps(dict(row)) for row in rows)
+                yield chunk if count == 0 else b',' + chunk
+                count += len(rows)
+                rows = c.fetchmany(1000)
+            yield b'],"count":' + str(count).encode() + b'}'
+    
+    try:
+        # Run the query and first fetch now, so a database error becomes a 500
+        # rather than a 200 with truncated JSON
+        chunks = generate()
+        head = next(chunks)
+        return Response(stream_with_context(chain([head], chunks)), mimetype='application/json')
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return ojsonify({"status": "error", "message": str(e)}), 500
+
+WORD_EXISTS_SQL = '''
+    SELECT id FROM words 
+    WHERE word = ? AND device_id = ? AND is_deleted = 0
+'''
+
+WORD_INSERT_SQL = '''
+    INSERT INTO words 
+    (word, meaning_bangla, meaning_english, synonyms, example_sentence, 
+     category, date_added, device_id, last_synced, sync_status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending')
+'''
 
 @app.route('/api/words/add', methods=['POST', 'OPTIONS'])
 def add_word():
@@ -258,7 +482,7 @@ def add_word():
         required_fields = ['word', 'meaning_bangla', 'meaning_english', 'synonyms', 'example_sentence']
         for field in required_fields:
             if not data.get(field, '').strip():
-                return jsonify({
+                return ojsonify({
                     "status": "error", 
                     "message": f"Field '{field}' is required"
                 }), 400
@@ -272,26 +496,18 @@ def add_word():
         device_id = data.get('device_id', 'unknown')
         current_time = datetime.now().isoformat()
         
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             # Check if word exists for this device
-            c.execute('''
-                SELECT id FROM words 
-                WHERE word = ? AND device_id = ? AND is_deleted = 0
-            ''', (word, device_id))
+            c.execute(WORD_EXISTS_SQL, (word, device_id))
             
             if c.fetchone():
-                return jsonify({
+                return ojsonify({
                     "status": "error", 
                     "message": f"Word '{word}' already exists for this device"
                 }), 400
             
             # Insert new word
-            c.execute('''
-                INSERT INTO words 
-                (word, meaning_bangla, meaning_english, synonyms, example_sentence, 
-                 category, date_added, device_id, last_synced, sync_status)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending')
-            ''', (
+            c.execute(WORD_INSERT_SQL, (
                 word,
                 meaning_bangla,
                 meaning_english,
@@ -304,26 +520,25 @@ def add_word():
             ))
             
             word_id = c.lastrowid
-            
-            # Update analytics cache
-            c.execute('DELETE FROM analytics_cache WHERE key = "category_stats"')
-            
-            return jsonify({
-                "status": "success",
-                "message": "Word added successfully",
-                "word_id": word_id,
-                "word": {
-                    "id": word_id,
-                    "word": word,
-                    "meaning_bangla": meaning_bangla,
-                    "meaning_english": meaning_english,
-                    "category": category,
-                    "date_added": current_time
-                }
-            })
+        
+        invalidate_analytics_cache()
+        
+        return ojsonify({
+            "status": "success",
+            "message": "Word added successfully",
+            "word_id": word_id,
+            "word": {
+                "id": word_id,
+                "word": word,
+                "meaning_bangla": meaning_bangla,
+                "meaning_english": meaning_english,
+                "category": category,
+                "date_added": current_time
+            }
+        })
             
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return ojsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/words/edit', methods=['POST', 'OPTIONS'])
 def edit_word():
@@ -335,24 +550,36 @@ def edit_word():
         word_id = data.get('id')
         
         if not word_id:
-            return jsonify({"status": "error", "message": "Word ID is required"}), 400
+            return ojsonify({"status": "error", "message": "Word ID is required"}), 400
         
         # Validate required fields
         required_fields = ['word', 'meaning_bangla', 'meaning_english', 'synonyms', 'example_sentence']
         for field in required_fields:
             if not data.get(field, '').strip():
-                return jsonify({
+                return ojsonify({
                     "status": "error", 
                     "message": f"Field '{field}' is required"
                 }), 400
+        
+        # Prepare values before taking the write lock
+        values = (
+            data['word'].strip().title(),
+            data['meaning_bangla'].strip(),
+            data['meaning_english'].strip(),
+            data['synonyms'].strip(),
+            data['example_sentence'].strip(),
+            data.get('category', 'General Vocabulary').strip(),
+            datetime.now().isoformat(),
+            word_id
+        )
 
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             # Check if word exists
             c.execute('SELECT device_id FROM words WHERE id = ?', (word_id,))
             existing = c.fetchone()
             
             if not existing:
-                return jsonify({"status": "error", "message": "Word not found"}), 404
+                return ojsonify({"status": "error", "message": "Word not found"}), 404
             
             # Update word
             c.execute('''
@@ -360,27 +587,17 @@ def edit_word():
                 SET word = ?, meaning_bangla = ?, meaning_english = ?, synonyms = ?, 
                     example_sentence = ?, category = ?, is_edited = 1, last_synced = ?
                 WHERE id = ?
-            ''', (
-                data['word'].strip().title(),
-                data['meaning_bangla'].strip(),
-                data['meaning_english'].strip(),
-                data['synonyms'].strip(),
-                data['example_sentence'].strip(),
-                data.get('category', 'General Vocabulary').strip(),
-                datetime.now().isoformat(),
-                word_id
-            ))
-            
-            # Update analytics cache
-            c.execute('DELETE FROM analytics_cache WHERE key = "category_stats"')
-            
-            return jsonify({
-                "status": "success", 
-                "message": "Word updated successfully"
-            })
+            ''', values)
+        
+        invalidate_analytics_cache()
+        
+        return ojsonify({
+            "status": "success", 
+            "message": "Word updated successfully"
+        })
             
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return ojsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/words/delete', methods=['POST', 'OPTIONS'])
 def delete_word():
@@ -392,26 +609,27 @@ def delete_word():
         word_id = data.get('id')
         
         if not word_id:
-            return jsonify({"status": "error", "message": "Word ID is required"}), 400
+            return ojsonify({"status": "error", "message": "Word ID is required"}), 400
+        
+        current_time = datetime.now().isoformat()
 
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             # Soft delete
             c.execute('''
                 UPDATE words 
                 SET is_deleted = 1, last_synced = ? 
                 WHERE id = ?
-            ''', (datetime.now().isoformat(), word_id))
-            
-            # Update analytics cache
-            c.execute('DELETE FROM analytics_cache WHERE key = "category_stats"')
-            
-            return jsonify({
-                "status": "success", 
-                "message": "Word deleted successfully"
-            })
+            ''', (current_time, word_id))
+        
+        invalidate_analytics_cache()
+        
+        return ojsonify({
+            "status": "success", 
+            "message": "Word deleted successfully"
+        })
             
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return ojsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/analytics', methods=['GET', 'OPTIONS'])
 def get_analytics():
@@ -419,39 +637,36 @@ def get_analytics():
         return '', 200
         
     try:
+        # Check cache first, so a hit never touches the connection pool
+        with _ANALYTICS_LOCK:
+            cached = _ANALYTICS_CACHE["data"]
+            fresh = time.monotonic() - _ANALYTICS_CACHE["ts"] < ANALYTICS_TTL
+            generation = _ANALYTICS_CACHE["generation"]
+        if cached is not None and fresh:
+            return ojsonify(cached)
+        
         with get_db_cursor() as (c, conn):
-            # Check cache first
-            c.execute('SELECT data FROM analytics_cache WHERE key = ?', ('category_stats',))
-            cache = c.fetchone()
-            
-            if cache:
-                try:
-                    data = json.loads(cache[0])
-                    # Check if cache is fresh (less than 5 minutes old)
-                    c.execute('SELECT updated_at FROM analytics_cache WHERE key = ?', ('category_stats',))
-                    updated_at = datetime.fromisoformat(c.fetchone()[0])
-                    if (datetime.now() - updated_at).total_seconds() < 300:  # 5 minutes
-                        return jsonify(data)
-                except:
-                    pass  # Cache corrupted, recalculate
-            
             # Calculate fresh analytics
             # Total Words
             c.execute("SELECT COUNT(*) FROM words WHERE is_deleted = 0")
             total_words = c.fetchone()[0]
             
             # Words per Category
+            # Grouping is served by the covering partial index idx_words_active_cat
             c.execute('''
-                SELECT category, COUNT(*) as count 
-                FROM words 
-                WHERE is_deleted = 0 
-                GROUP BY category
+                SELECT category, count FROM (
+                    SELECT category, COUNT(*) as count 
+                    FROM words 
+                    WHERE is_deleted = 0 
+                    GROUP BY category
+                )
                 ORDER BY count DESC
             ''')
             category_stats = [{"name": row[0], "count": row[1]} for row in c.fetchall()]
             
             # Recent activity (last 7 days)
-            seven_days_ago = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+            now = datetime.now()
+            seven_days_ago = (now - timedelta(days=7)).strftime('%Y-%m-%d')
             c.execute('''
                 SELECT DATE(date_added) as date, COUNT(*) as count
                 FROM words 
@@ -484,19 +699,19 @@ def get_analytics():
                 "avg_accuracy": round(avg_accuracy, 1),
                 "total_quizzes": total_quizzes,
                 "recent_activity": recent_activity,
-                "updated_at": datetime.now().isoformat()
+                "updated_at": now.isoformat()
             }
             
-            # Cache the results
-            c.execute('''
-                INSERT OR REPLACE INTO analytics_cache (key, data, updated_at)
-                VALUES (?, ?, ?)
-            ''', ('category_stats', json.dumps(analytics_data), datetime.now().isoformat()))
+            # Cache the results, unless a write committed while they were computed
+            with _ANALYTICS_LOCK:
+                if _ANALYTICS_CACHE["generation"] == generation:
+                    _ANALYTICS_CACHE["data"] = analytics_data
+                    _ANALYTICS_CACHE["ts"] = time.monotonic()
             
-            return jsonify(analytics_data)
+            return ojsonify(analytics_data)
             
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return ojsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/categories', methods=['GET', 'OPTIONS'])
 def get_categories():
@@ -518,9 +733,9 @@ def get_categories():
                 } 
                 for row in c.fetchall()
             ]
-            return jsonify(categories)
+            return ojsonify(categories)
     except Exception as e:
-        return jsonify({"error": str(e)})
+        return ojsonify({"error": str(e)})
 
 @app.route('/api/categories/add', methods=['POST', 'OPTIONS'])
 def add_category():
@@ -532,16 +747,16 @@ def add_category():
         name = data.get('name', '').strip()
         
         if not name:
-            return jsonify({
+            return ojsonify({
                 "status": "error", 
                 "message": "Category name is required"
             }), 400
         
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             # Check if category exists
             c.execute('SELECT name FROM categories WHERE name = ?', (name,))
             if c.fetchone():
-                return jsonify({
+                return ojsonify({
                     "status": "error", 
                     "message": f"Category '{name}' already exists"
                 }), 400
@@ -552,13 +767,13 @@ def add_category():
                 VALUES (?, ?, 0)
             ''', (name, data.get('color', '#6366f1')))
             
-            return jsonify({
+            return ojsonify({
                 "status": "success", 
                 "message": f"Category '{name}' added successfully"
             })
         
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return ojsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/categories/edit', methods=['POST', 'OPTIONS'])
 def edit_category():
@@ -571,24 +786,24 @@ def edit_category():
         new_name = data.get('new_name')
         
         if not old_name or not new_name:
-            return jsonify({
+            return ojsonify({
                 "status": "error", 
                 "message": "Both old and new names are required"
             }), 400
         
         if old_name == new_name:
-            return jsonify({
+            return ojsonify({
                 "status": "error", 
                 "message": "New name must be different from old name"
             }), 400
 
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             # Check if old category exists
             c.execute('SELECT is_default FROM categories WHERE name = ?', (old_name,))
             old_cat = c.fetchone()
             
             if not old_cat:
-                return jsonify({
+                return ojsonify({
                     "status": "error", 
                     "message": f"Category '{old_name}' not found"
                 }), 404
@@ -596,14 +811,14 @@ def edit_category():
             # Check if new category already exists
             c.execute('SELECT name FROM categories WHERE name = ?', (new_name,))
             if c.fetchone():
-                return jsonify({
+                return ojsonify({
                     "status": "error", 
                     "message": f"Category '{new_name}' already exists"
                 }), 400
             
             # Check if trying to edit default category
             if old_cat[0] == 1:
-                return jsonify({
+                return ojsonify({
                     "status": "error", 
                     "message": "Cannot edit default categories"
                 }), 400
@@ -617,14 +832,16 @@ def edit_category():
                 SET category = ?, sync_status = 'pending'
                 WHERE category = ? AND is_deleted = 0
             ''', (new_name, old_name))
-            
-            return jsonify({
-                "status": "success", 
-                "message": f"Category '{old_name}' updated to '{new_name}'"
-            })
+        
+        invalidate_analytics_cache()
+        
+        return ojsonify({
+            "status": "success", 
+            "message": f"Category '{old_name}' updated to '{new_name}'"
+        })
             
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return ojsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/categories/delete', methods=['POST', 'OPTIONS'])
 def delete_category():
@@ -636,25 +853,25 @@ def delete_category():
         name = data.get('name', '').strip()
         
         if not name:
-            return jsonify({
+            return ojsonify({
                 "status": "error", 
                 "message": "Category name is required"
             }), 400
         
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             # Check if category exists
             c.execute('SELECT is_default FROM categories WHERE name = ?', (name,))
             result = c.fetchone()
             
             if not result:
-                return jsonify({
+                return ojsonify({
                     "status": "error", 
                     "message": f"Category '{name}' not found"
                 }), 404
             
             # Check if it's a default category
             if result[0] == 1:
-                return jsonify({
+                return ojsonify({
                     "status": "error", 
                     "message": "Cannot delete default categories"
                 }), 400
@@ -670,17 +887,42 @@ def delete_category():
             
             # Delete category
             c.execute('DELETE FROM categories WHERE name = ?', (name,))
-            
-            # Update analytics cache
-            c.execute('DELETE FROM analytics_cache WHERE key = "category_stats"')
-            
-            return jsonify({
-                "status": "success", 
-                "message": f"Category deleted. {moved_count} words moved to General Vocabulary."
-            })
+        
+        invalidate_analytics_cache()
+        
+        return ojsonify({
+            "status": "success", 
+            "message": f"Category deleted. {moved_count} words moved to General Vocabulary."
+        })
         
     except Exception as e:
-        return jsonify({"status": "error", "message": str(e)}), 500
+        return ojsonify({"status": "error", "message": str(e)}), 500
+
+# Statements used by save_quiz_result; kept at module scope so sqlite3's
+# statement cache reuses the compiled programs across requests
+QUIZ_RESULT_INSERT_SQL = '''
+    INSERT INTO quiz_results 
+    (device_id, quiz_type, score, total_questions, accuracy, 
+     time_taken_seconds, correct_words, incorrect_words, details, timestamp)
+    VALUES (:device_id, :quiz_type, :score, :total_questions, :accuracy,
+            :time_taken_seconds, :correct_words, :incorrect_words, :details, :timestamp)
+'''
+
+QUIZ_STATS_UPSERT_SQL = '''
+    INSERT INTO quiz_statistics 
+    (device_id, total_quizzes, total_correct, total_questions, 
+     total_time_seconds, best_score, best_accuracy, last_quiz_date)
+    VALUES (:device_id, 1, :score, :total_questions, :time_taken_seconds,
+            :score, :accuracy, :timestamp)
+    ON CONFLICT(device_id) DO UPDATE SET
+        total_quizzes = total_quizzes + 1,
+        total_correct = total_correct + :score,
+        total_questions = total_questions + :total_questions,
+        total_time_seconds = total_time_seconds + :time_taken_seconds,
+        best_score = max(best_score, :score),
+        best_accuracy = max(best_accuracy, :accuracy),
+        last_quiz_date = :timestamp
+'''
 
 @app.route('/api/save_quiz_result', methods=['POST', 'OPTIONS'])
 def save_quiz_result():
@@ -691,7 +933,7 @@ def save_quiz_result():
     try:
         data = request.json
         if not data:
-            return jsonify({"status": "error", "message": "No data"}), 400
+            return ojsonify({"status": "error", "message": "No data"}), 400
         
         device_id = data.get('device_id', 'unknown')
         quiz_type = data.get('quiz_type', 'multiple_choice')
@@ -699,65 +941,39 @@ def save_quiz_result():
         total_questions = int(data.get('total_questions', 10))
         accuracy = float(data.get('accuracy', 0.0))
         time_taken_seconds = int(data.get('time_taken_seconds', 0))
-        correct_words = json.dumps(data.get('correct_words', []))
-        incorrect_words = json.dumps(data.get('incorrect_words', []))
-        details = json.dumps(data.get('details', {}))
+        correct_words = orjson.dumps(data.get('correct_words', [])).decode()
+        incorrect_words = orjson.dumps(data.get('incorrect_words', [])).decode()
+        details = orjson.dumps(data.get('details', {})).decode()
         timestamp = datetime.now().isoformat()
         
         # Calculate accuracy if not provided
         if accuracy == 0 and total_questions > 0:
             accuracy = (score / total_questions) * 100
         
-        with get_db_cursor() as (c, conn):
-            # Save quiz result
-            c.execute('''
-                INSERT INTO quiz_results 
-                (device_id, quiz_type, score, total_questions, accuracy, 
-                 time_taken_seconds, correct_words, incorrect_words, details, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                device_id,
-                quiz_type,
-                score,
-                total_questions,
-                accuracy,
-                time_taken_seconds,
-                correct_words,
-                incorrect_words,
-                details,
-                timestamp
-            ))
-            
+        params = {
+            "device_id": device_id,
+            "quiz_type": quiz_type,
+            "score": score,
+            "total_questions": total_questions,
+            "accuracy": accuracy,
+            "time_taken_seconds": time_taken_seconds,
+            "correct_words": correct_words,
+            "incorrect_words": incorrect_words,
+            "details": details,
+            "timestamp": timestamp
+        }
+        
+        # Result and statistics are written in one IMMEDIATE transaction
+        with get_db_cursor(write=True) as (c, conn):
+            c.execute(QUIZ_RESULT_INSERT_SQL, params)
             result_id = c.lastrowid
-            
-            # Update or create quiz statistics
-            c.execute('''
-                INSERT INTO quiz_statistics 
-                (device_id, total_quizzes, total_correct, total_questions, 
-                 total_time_seconds, best_score, best_accuracy, last_quiz_date)
-                VALUES (?, 1, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(device_id) DO UPDATE SET
-                    total_quizzes = total_quizzes + 1,
-                    total_correct = total_correct + ?,
-                    total_questions = total_questions + ?,
-                    total_time_seconds = total_time_seconds + ?,
-                    best_score = CASE WHEN ? > best_score THEN ? ELSE best_score END,
-                    best_accuracy = CASE WHEN ? > best_accuracy THEN ? ELSE best_accuracy END,
-                    last_quiz_date = ?
-            ''', (
-                device_id, score, total_questions, time_taken_seconds, score, accuracy, timestamp,
-                score, total_questions, time_taken_seconds,
-                score, score, accuracy, accuracy, timestamp
-            ))
-            
-            # Log the action
-            c.execute('''
-                INSERT INTO sync_log (device_id, action, details)
-                VALUES (?, ?, ?)
-            ''', (device_id, 'quiz_completed', 
-                  f'Quiz completed: {score}/{total_questions} ({accuracy:.1f}%) in {time_taken_seconds}s'))
+            c.execute(QUIZ_STATS_UPSERT_SQL, params)
+        
+        # Log the action
+        log_sync(device_id, 'quiz_completed',
+                 f'Quiz completed: {score}/{total_questions} ({accuracy:.1f}%) in {time_taken_seconds}s')
         
-        return jsonify({
+        return ojsonify({
             "status": "success",
             "message": "Quiz result saved",
             "result_id": result_id,
@@ -765,8 +981,17 @@ def save_quiz_result():
         })
         
     except Exception as e:
-        print(f"❌ Error saving quiz result: {e}")
-        return jsonify({"status": "error", "message": str(e)}), 500
+        logger.error("❌ Error saving quiz result: %s", e)
+        return ojsonify({"status": "error", "message": str(e)}), 500
+
+def _word_list(text):
+    """Decode a stored word list; rows written by older code may not be valid JSON"""
+    if not text:
+        return []
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError:
+        return []
 
 @app.route('/api/quiz_results', methods=['GET', 'OPTIONS'])
 def get_quiz_results():
@@ -779,7 +1004,7 @@ def get_quiz_results():
         limit = int(request.args.get('limit', 10))
         
         if not device_id:
-            return jsonify({"status": "error", "message": "device_id required"}), 400
+            return ojsonify({"status": "error", "message": "device_id required"}), 400
         
         with get_db_cursor() as (c, conn):
             # Get results for specific device
@@ -792,36 +1017,54 @@ def get_quiz_results():
                 LIMIT ?
             ''', (device_id, limit))
             
-            results = []
-            for row in c.fetchall():
-                try:
-                    correct_words = json.loads(row[7]) if row[7] else []
-                    incorrect_words = json.loads(row[8]) if row[8] else []
-                except:
-                    correct_words = []
-                    incorrect_words = []
-                
-                results.append({
-                    "id": row[0],
-                    "quiz_type": row[1],
-                    "score": row[2],
-                    "total_questions": row[3],
-                    "accuracy": float(row[4]),
-                    "time_taken_seconds": row[5],
-                    "timestamp": row[6],
-                    "correct_words": correct_words,
-                    "incorrect_words": incorrect_words
-                })
-            
-            return jsonify({
+            # A malformed word list comes back as [] instead of failing the whole listing
+            results = [{
+                "id": row[0],
+                "quiz_type": row[1],
+                "score": row[2],
+                "total_questions": row[3],
+                "accuracy": float(row[4]),
+                "time_taken_seconds": row[5],
+                "timestamp": row[6],
+                "correct_words": _word_list(row[7]),
+                "incorrect_words": _word_list(row[8])
+            } for row in c.fetchall()]
+            
+            return ojsonify({
                 "status": "success",
                 "results": results,
                 "total_count": len(results)
             })
         
     except Exception as e:
-        print(f"❌ Error getting quiz results: {e}")
-        return jsonify({"status": "error", "message": str(e)}), 500
+        logger.error("❌ Error getting quiz results: %s", e)
+        return ojsonify({"status": "error", "message": str(e)}), 500
+
+# Totals plus today's count from quiz_daily_counters, both single-row lookups
+QUIZ_STATS_SELECT_SQL = '''
+    SELECT total_quizzes, total_correct, total_questions, 
+           total_time_seconds, best_score, best_accuracy, last_quiz_date,
+           (SELECT count 
+            FROM quiz_daily_counters 
+            WHERE device_id = :device_id AND quiz_date = :today)
+    FROM quiz_statistics 
+    WHERE device_id = :device_id
+'''
+
+# Returned for devices with no quiz_statistics row yet
+DEFAULT_QUIZ_STATISTICS = {
+    "device_id": None,
+    "total_quizzes": 0,
+    "total_correct": 0,
+    "total_questions": 0,
+    "total_time_seconds": 0,
+    "best_score": 0,
+    "best_accuracy": 0,
+    "last_quiz_date": None,
+    "overall_accuracy": 0,
+    "average_time_per_question": 0,
+    "quizzes_today": 0
+}
 
 @app.route('/api/quiz_statistics', methods=['GET', 'OPTIONS'])
 def get_quiz_statistics():
@@ -833,87 +1076,78 @@ def get_quiz_statistics():
         device_id = request.args.get('device_id', '')
         
         if not device_id:
-            return jsonify({"status": "error", "message": "device_id required"}), 400
+            return ojsonify({"status": "error", "message": "device_id required"}), 400
         
-        with get_db_cursor() as (c, conn):
-            # Get statistics for specific device
-            c.execute('''
-                SELECT total_quizzes, total_correct, total_questions, 
-                       total_time_seconds, best_score, best_accuracy, last_quiz_date
-                FROM quiz_statistics 
-                WHERE device_id = ?
-            ''', (device_id,))
-            
-            stats_row = c.fetchone()
-            
-            if not stats_row:
-                # Return default statistics
-                return jsonify({
-                    "status": "success",
-                    "statistics": {
-                        "device_id": device_id,
-                        "total_quizzes": 0,
-                        "total_correct": 0,
-                        "total_questions": 0,
-                        "total_time_seconds": 0,
-                        "best_score": 0,
-                        "best_accuracy": 0,
-                        "last_quiz_date": None,
-                        "overall_accuracy": 0,
-                        "average_time_per_question": 0,
-                        "quizzes_today": 0
-                    }
-                })
-            
-            # Calculate statistics
-            total_quizzes = stats_row[0] or 0
-            total_correct = stats_row[1] or 0
-            total_questions = stats_row[2] or 0
-            total_time_seconds = stats_row[3] or 0
-            best_score = stats_row[4] or 0
-            best_accuracy = float(stats_row[5] or 0)
-            last_quiz_date = stats_row[6]
-            
-            overall_accuracy = 0
-            if total_questions > 0:
-                overall_accuracy = (total_correct / total_questions) * 100
-            
-            average_time_per_question = 0
-            if total_questions > 0:
-                average_time_per_question = total_time_seconds / total_questions
-            
-            # Get quizzes today
-            today = datetime.now().strftime('%Y-%m-%d')
-            c.execute('''
-                SELECT COUNT(*) 
-                FROM quiz_results 
-                WHERE device_id = ? AND DATE(timestamp) = ?
-            ''', (device_id, today))
-            
-            quizzes_today = c.fetchone()[0] or 0
-            
-            statistics = {
-                "device_id": device_id,
-                "total_quizzes": total_quizzes,
-                "total_correct": total_correct,
-                "total_questions": total_questions,
-                "total_time_seconds": total_time_seconds,
-                "best_score": best_score,
-                "best_accuracy": best_accuracy,
-                "last_quiz_date": last_quiz_date,
-                "overall_accuracy": round(overall_accuracy, 1),
-                "average_time_per_question": round(average_time_per_question, 1),
-                "quizzes_today": quizzes_today
-            }
-            
-            return jsonify({
+        today = datetime.now().strftime('%Y-%m-%d')
+        
+        # Plain autocommit read - the connection goes straight back to the pool
+        with get_db_connection() as conn:
+            stats_row = conn.execute(QUIZ_STATS_SELECT_SQL, {"device_id": device_id, "today": today}).fetchone()
+        
+        if not stats_row:
+            # Device has never taken a quiz
+            return ojsonify({
                 "status": "success",
-                "statistics": statistics
+                "statistics": {**DEFAULT_QUIZ_STATISTICS, "device_id": device_id}
             })
         
+        # Calculate statistics
+        total_quizzes = stats_row[0] or 0
+        total_correct = stats_row[1] or 0
+        total_questions = stats_row[2] or 0
+        total_time_seconds = stats_row[3] or 0
+        best_score = stats_row[4] or 0
+        best_accuracy = float(stats_row[5] or 0)
+        last_quiz_date = stats_row[6]
+        quizzes_today = stats_row[7] or 0
+        
+        overall_accuracy = 0
+        if total_questions > 0:
+            overall_accuracy = (total_correct / total_questions) * 100
+        
+        average_time_per_question = 0
+        if total_questions > 0:
+            average_time_per_question = total_time_seconds / total_questions
+        
+        statistics = {
+            "device_id": device_id,
+            "total_quizzes": total_quizzes,
+            "total_correct": total_correct,
+            "total_questions": total_questions,
+            "total_time_seconds": total_time_seconds,
+            "best_score": best_score,
+            "best_accuracy": best_accuracy,
+            "last_quiz_date": last_quiz_date,
+            "overall_accuracy": round(overall_accuracy, 1),
+            "average_time_per_question": round(average_time_per_question, 1),
+            "quizzes_today": quizzes_today
+        }
+        
+        return ojsonify({
+            "status": "success",
+            "statistics": statistics
+        })
+        
     except Exception as e:
-        print(f"❌ Error getting quiz statistics: {e}")
-        return jsonify({"status": "error", "message": str(e)}), 500
+        logger.error("❌ Error getting quiz statistics: %s", e)
+        return ojsonify({"status": "error", "message": str(e)}), 500
+
+EXPORT_SQL = '''
+    SELECT 
+        word,
+        meaning_bangla,
+        meaning_english,
+        synonyms,
+        example_sentence,
+        category,
+        date_added
+    FROM words 
+    WHERE is_deleted = 0
+    ORDER BY date_added DESC
+'''
+
+# Rows pulled from the cursor per fetchmany() call while exporting
+EXPORT_BATCH = 5000
 
 @app.route('/api/export_excel', methods=['GET', 'OPTIONS'])
 def export_excel():
@@ -921,41 +1155,78 @@ def export_excel():
         return '', 200
     
     try:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"vocabulary_export_{timestamp}.xlsx"
+        
+        # Write rows straight from the cursor into an in-memory workbook
+        buf = io.BytesIO()
+        workbook = xlsxwriter.Workbook(buf, {'constant_memory': True})
+        worksheet = workbook.add_worksheet()
+        header_format = workbook.add_format({'bold': True})
+        
         with get_db_connection() as conn:
-            query = '''
-                SELECT 
-                    word,
-                    meaning_bangla,
-                    meaning_english,
-                    synonyms,
-                    example_sentence,
-                    category,
-                    date_added
-                FROM words 
-                WHERE is_deleted = 0
-                ORDER BY date_added DESC
-            '''
-            
-            df = pd.read_sql_query(query, conn)
-            
-            if df.empty:
-                df = pd.DataFrame(columns=['word', 'meaning_bangla', 'meaning_english', 'category', 'date_added'])
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"vocabulary_export_{timestamp}.xlsx"
-            
-            df.to_excel(EXCEL_FILE, index=False)
-            
-            return send_file(
-                EXCEL_FILE,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name=filename
-            )
+            cursor = conn.execute(EXPORT_SQL)
+            worksheet.write_row(0, 0, [column[0] for column in cursor.description], header_format)
+            row_num = 1
+            while True:
+                rows = cursor.fetchmany(EXPORT_BATCH)
+                if not rows:
+                    break
+                for row in rows:
+                    worksheet.write_row(row_num, 0, row)
+                    row_num += 1
+        
+        workbook.close()
+        buf.seek(0)
+        
+        return send_file(
+            buf,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=filename,
+            max_age=0
+        )
         
     except Exception as e:
-        print(f"Excel export error: {e}")
-        return jsonify({"error": str(e)}), 500
+        logger.error("Excel export error: %s", e)
+        return ojsonify({"error": str(e)}), 500
+
+# Canonical import columns
+IMPORT_COLUMNS = ['word', 'meaning_bangla', 'meaning_english', 'synonyms', 'example_sentence', 'category']
+
+# Short headers accepted for them (matched after normalize_column)
+IMPORT_COLUMN_ALIASES = {
+    'bangla': 'meaning_bangla',
+    'english': 'meaning_english',
+    'example': 'example_sentence'
+}
+
+def normalize_column(name):
+    """Lower-case a spreadsheet header and join its words with underscores"""
+    name = '_'.join(str(name).strip().lower().split())
+    return IMPORT_COLUMN_ALIASES.get(name, name)
+
+# New words are inserted and a live row for the same word is edited in place.
+# A soft-deleted word used to fail on idx_word_device and be skipped with an error;
+# it is now re-added as a new word (fresh date_added, not edited).
+# Every SET reads the row's values from before the update
+IMPORT_UPSERT_SQL = '''
+    INSERT INTO words 
+    (word, meaning_bangla, meaning_english, synonyms, example_sentence, 
+     category, date_added, device_id, last_synced, sync_status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending')
+    ON CONFLICT(word, device_id) DO UPDATE SET
+        meaning_bangla = excluded.meaning_bangla,
+        meaning_english = excluded.meaning_english,
+        synonyms = excluded.synonyms,
+        example_sentence = excluded.example_sentence,
+        category = excluded.category,
+        date_added = CASE WHEN is_deleted THEN excluded.date_added ELSE date_added END,
+        last_synced = excluded.last_synced,
+        sync_status = 'pending',
+        is_edited = CASE WHEN is_deleted THEN 0 ELSE 1 END,
+        is_deleted = 0
+'''
 
 # Import Excel endpoint (same as before, but enhanced)
 @app.route('/api/import_excel', methods=['POST', 'OPTIONS'])
@@ -965,119 +1236,70 @@ def import_excel():
     
     try:
         if 'file' not in request.files:
-            return jsonify({"status": "error", "message": "No file uploaded"}), 400
+            return ojsonify({"status": "error", "message": "No file uploaded"}), 400
         
         file = request.files['file']
         
         if file.filename == '':
-            return jsonify({"status": "error", "message": "No file selected"}), 400
+            return ojsonify({"status": "error", "message": "No file selected"}), 400
         
         if not allowed_file(file.filename):
-            return jsonify({"status": "error", "message": "Only Excel files (.xlsx, .xls) are allowed"}), 400
+            return ojsonify({"status": "error", "message": "Only Excel files (.xlsx, .xls) are allowed"}), 400
         
         device_id = request.form.get('device_id', 'unknown')
         
-        # Save and read file
-        filename = f"{uuid.uuid4().hex}_{file.filename}"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        
+        # Read the upload straight from the request stream (openpyxl reads xlsx in read-only mode)
+        engine = 'openpyxl' if file.filename.lower().endswith('.xlsx') else None
         try:
-            df = pd.read_excel(filepath, keep_default_na=False)
-            df = df.replace([np.nan, pd.NaT], '')
+            # Every target column is text, so skip type inference and unknown columns
+            df = pd.read_excel(
+                file.stream,
+                engine=engine,
+                dtype=str,
+                keep_default_na=False,
+                usecols=lambda column: normalize_column(column) in IMPORT_COLUMNS
+            )
         except Exception as e:
-            if os.path.exists(filepath):
-                os.remove(filepath)
-            return jsonify({"status": "error", "message": f"Failed to read Excel file: {str(e)}"}), 400
-        
-        # Clean up uploaded file
-        if os.path.exists(filepath):
-            os.remove(filepath)
+            return ojsonify({"status": "error", "message": f"Failed to read Excel file: {str(e)}"}), 400
         
         # Process the file (simplified version)
         total_rows = len(df)
-        imported_rows = 0
-        skipped_rows = 0
         current_time = datetime.now().isoformat()
         
-        with get_db_cursor() as (c, conn):
-            for index, row in df.iterrows():
-                try:
-                    # Extract data from row (assuming specific column names)
-                    word = str(row.get('word', row.get('Word', ''))).strip()
-                    if not word:
-                        skipped_rows += 1
-                        continue
-                    
-                    meaning_bangla = str(row.get('meaning_bangla', row.get('Bangla', ''))).strip()
-                    meaning_english = str(row.get('meaning_english', row.get('English', ''))).strip()
-                    synonyms = str(row.get('synonyms', row.get('Synonyms', ''))).strip()
-                    example_sentence = str(row.get('example_sentence', row.get('Example', ''))).strip()
-                    category = str(row.get('category', row.get('Category', 'General Vocabulary'))).strip()
-                    
-                    word = word.title()
-                    
-                    # Check if word exists
-                    c.execute('''
-                        SELECT id FROM words 
-                        WHERE word = ? AND device_id = ? AND is_deleted = 0
-                    ''', (word, device_id))
-                    
-                    existing = c.fetchone()
-                    
-                    if existing:
-                        # Update existing word
-                        c.execute('''
-                            UPDATE words SET
-                                meaning_bangla = ?,
-                                meaning_english = ?,
-                                synonyms = ?,
-                                example_sentence = ?,
-                                category = ?,
-                                last_synced = ?,
-                                sync_status = 'pending',
-                                is_edited = 1
-                            WHERE id = ?
-                        ''', (
-                            meaning_bangla,
-                            meaning_english,
-                            synonyms,
-                            example_sentence,
-                            category,
-                            current_time,
-                            existing[0]
-                        ))
-                    else:
-                        # Insert new word
-                        c.execute('''
-                            INSERT INTO words 
-                            (word, meaning_bangla, meaning_english, synonyms, example_sentence, 
-                             category, date_added, device_id, last_synced, sync_status)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'pending')
-                        ''', (
-                            word,
-                            meaning_bangla,
-                            meaning_english,
-                            synonyms,
-                            example_sentence,
-                            category,
-                            current_time,
-                            device_id,
-                            current_time
-                        ))
-                    
-                    imported_rows += 1
-                    
-                except Exception as e:
-                    print(f"Error importing row {index}: {e}")
-                    skipped_rows += 1
-                    continue
-        
-        # Clear analytics cache
-        with get_db_cursor() as (c, conn):
-            c.execute('DELETE FROM analytics_cache WHERE key = "category_stats"')
+        # Normalize column names once (first header wins), then clean whole columns at a time
+        df.columns = [normalize_column(column) for column in df.columns]
+        df = df.loc[:, ~df.columns.duplicated()]
+        for name in IMPORT_COLUMNS:
+            if name not in df.columns:
+                df[name] = 'General Vocabulary' if name == 'category' else ''
+            df[name] = df[name].str.strip()
+        df['word'] = df['word'].str.title()
+        
+        has_word = df['word'] != ''
+        skipped_rows = int((~has_word).sum())
+        df = df[has_word]
+        imported_rows = len(df)
+        
+        # Keyed by word so in-file duplicates collapse (last one wins)
+        rows = {
+            word: tuple(values)
+            for word, *values in df[IMPORT_COLUMNS].itertuples(index=False, name=None)
+        }
+        
+        with get_db_cursor(write=True) as (c, conn):
+            c.executemany(IMPORT_UPSERT_SQL, [
+                (word,) + values + (current_time, device_id, current_time)
+                for word, values in rows.items()
+            ])
+        
+        if imported_rows:
+            invalidate_analytics_cache()
+            # Refresh planner statistics after the bulk load, once the write lock is released;
+            # optimize only re-analyzes tables whose row counts have drifted
+            with get_db_connection() as conn:
+                conn.execute('PRAGMA optimize')
         
-        return jsonify({
+        return ojsonify({
             "status": "success",
             "message": f"Excel file imported successfully",
             "details": {
@@ -1089,8 +1311,8 @@ def import_excel():
         })
         
     except Exception as e:
-        print(f"❌ Import error: {e}")
-        return jsonify({"status": "error", "message": f"Import failed: {str(e)}"}), 500
+        logger.error("❌ Import error: %s", e)
+        return ojsonify({"status": "error", "message": f"Import failed: {str(e)}"}), 500
 
 if __name__ == '__main__':
     init_db()
@@ -1108,8 +1330,7 @@ if __name__ == '__main__':
     print("   - Excel import/export")
     print("="*70)
     
-    app.run(
-        host='0.0.0.0',
-        port=8000,
-        debug=True
-    )
\ No newline at end of file
+    # Waitress serves requests on a pool of threads with the debugger off; the
+    # threads check connections out of the pool, so WAL lets their reads overlap
+    from waitress import serve
+    serve(app, host='0.0.0.0', port=8000, threads=8, connection_limit=1000)
\ No newline at end of file
@@ -1,101 +1,64 @@
 import sqlite3
 
+# Placeholder strings pandas leaves behind for empty cells
+NAN_VALUES = ('nan', 'NaN', 'None', '<NA>', 'nan nan')
+
 def clean_nan_values_in_database():
     """Clean up existing 'nan' values in the database"""
     conn = sqlite3.connect('vocabulary.db')
     c = conn.cursor()
-    
+
     # Count affected records first
     print("Scanning for 'nan' values in database...")
-    
-    # Fields to check and clean
+
+    # Fields to check and clean, with the value a placeholder is replaced by
     fields_to_clean = [
-        ('meaning_bangla', 'Bangla meaning'),
-        ('meaning_english', 'English meaning'),
-        ('synonyms', 'Synonyms'),
-        ('example_sentence', 'Example sentence'),
-        ('category', 'Category')
+        ('meaning_bangla', 'Bangla meaning', ''),
+        ('meaning_english', 'English meaning', ''),
+        ('synonyms', 'Synonyms', ''),
+        ('example_sentence', 'Example sentence', ''),
+        ('category', 'Category', 'General Vocabulary')
     ]
-    
-    total_cleaned = 0
-    
-    for field, field_name in fields_to_clean:
-        # Count records with 'nan' in this field
-        c.execute(f"SELECT COUNT(*) FROM words WHERE {field} LIKE '%nan%'")
-        count = c.fetchone()[0]
-        
-        if count > 0:
+
+    placeholders = ', '.join('?' for _ in NAN_VALUES)
+
+    # Per-field counts in a single scan (exact matches only, so words like
+    # "nanotechnology" are left alone)
+    count_sql = "SELECT " + ", ".join(
+        f"SUM({field} IN ({placeholders}))" for field, _, _ in fields_to_clean
+    ) + " FROM words"
+    count_params = NAN_VALUES * len(fields_to_clean)
+    c.execute(count_sql, count_params)
+    for (field, field_name, _), count in zip(fields_to_clean, c.fetchone()):
+        if count:
             print(f"Found {count} records with 'nan' in {field_name}")
-            
-            # Clean the 'nan' values
-            c.execute(f"""
-                UPDATE words 
-                SET {field} = ''
-                WHERE {field} LIKE '%nan%' AND {field} != ''
-            """)
-            
-            # Also clean 'None' values
-            c.execute(f"""
-                UPDATE words 
-                SET {field} = ''
-                WHERE {field} LIKE '%None%' AND {field} != ''
-            """)
-            
-            # Also clean '<NA>' values
-            c.execute(f"""
-                UPDATE words 
-                SET {field} = ''
-                WHERE {field} LIKE '%<NA>%' AND {field} != ''
-            """)
-            
-            total_cleaned += count
-            print(f"Cleaned {field_name}")
-    
-    # Commit changes
+
+    # Clean every field in one UPDATE
+    set_clause = ", ".join(
+        f"{field} = CASE WHEN {field} IN ({placeholders}) THEN ? ELSE {field} END"
+        for field, _, _ in fields_to_clean
+    )
+    where_clause = " OR ".join(f"{field} IN ({placeholders})" for field, _, _ in fields_to_clean)
+    params = []
+    for _, _, replacement in fields_to_clean:
+        params.extend(NAN_VALUES)
+        params.append(replacement)
+    params.extend(count_params)
+
+    c.execute("BEGIN")
+    c.execute(f"UPDATE words SET {set_clause} WHERE {where_clause}", params)
+    total_cleaned = c.rowcount
     conn.commit()
-    
+
     # Verify cleanup
     print("\nVerification scan after cleanup:")
-    for field, field_name in fields_to_clean:
-        c.execute(f"SELECT COUNT(*) FROM words WHERE {field} LIKE '%nan%' OR {field} LIKE '%None%' OR {field} LIKE '%<NA>%'")
-        remaining = c.fetchone()[0]
-        print(f"Remaining 'nan' in {field_name}: {remaining}")
-    
-    # Also clean empty 'nan' strings that might be exactly 'nan'
-    c.execute("""
-        UPDATE words 
-        SET meaning_bangla = ''
-        WHERE meaning_bangla = 'nan'
-    """)
-    
-    c.execute("""
-        UPDATE words 
-        SET meaning_english = ''
-        WHERE meaning_english = 'nan'
-    """)
-    
-    c.execute("""
-        UPDATE words 
-        SET synonyms = ''
-        WHERE synonyms = 'nan'
-    """)
-    
-    c.execute("""
-        UPDATE words 
-        SET example_sentence = ''
-        WHERE example_sentence = 'nan'
-    """)
-    
-    c.execute("""
-        UPDATE words 
-        SET category = 'General Vocabulary'
-        WHERE category = 'nan'
-    """)
-    
-    conn.commit()
+    c.execute(count_sql, count_params)
+    for (field, field_name, _), remaining in zip(fields_to_clean, c.fetchone()):
+        print(f"Remaining 'nan' in {field_name}: {remaining or 0}")
+
     conn.close()
-    
+
     print(f"\n✅ Cleanup complete! Total records cleaned: {total_cleaned}")
 
 if __name__ == "__main__":
-    clean_nan_values_in_database()
\ No newline at end of file
+    clean_nan_values_in_database()
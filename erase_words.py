@@ -30,9 +30,14 @@ def erase_all_words_from_server():
         backup_file = f"vocabulary_backup_{timestamp}.db"
         
         if os.path.exists(DB_FILE):
-            with open(DB_FILE, 'rb') as f:
-                with open(backup_file, 'wb') as backup:
-                    backup.write(f.read())
+            # Online backup copies pages under SQLite's locking (includes WAL contents)
+            src = sqlite3.connect(DB_FILE)
+            dst = sqlite3.connect(backup_file)
+            try:
+                src.backup(dst, pages=1024)
+            finally:
+                dst.close()
+                src.close()
             print(f"\n✅ Backup created: {backup_file}")
         else:
             print(f"\n❌ Database file not found: {DB_FILE}")
@@ -0,0 +1,25 @@
+# Gunicorn configuration for the API server
+# Run from the project root: gunicorn -c gunicorn.conf.py api.server:app
+# This is the deployment stack; `python api/server.py` (waitress, one process)
+# is only for running it locally
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# Threaded workers share each process's SQLite connection pool; WAL lets
+# the threads read concurrently while writers queue on BEGIN IMMEDIATE.
+# The /api/analytics cache is per process: a write only invalidates the copy
+# in the worker that handled it, so other workers can serve analytics up to
+# ANALYTICS_TTL (5 minutes) old. Set WEB_CONCURRENCY=1 if that matters
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+timeout = 60
+
+# Keep the app un-preloaded so every worker opens its own connections after fork
+preload_app = False
+
+def post_fork(server, worker):
+    """Make sure the schema exists before the worker starts serving"""
+    from api.server import init_db
+    init_db()
@@ -1,19 +1,55 @@
-from flask import Flask, request, jsonify, send_file, render_template
+from flask import Flask, request, jsonify, send_file, render_template, Response, stream_with_context
 from flask_cors import CORS
+from flask_compress import Compress
+from flask.json.provider import JSONProvider
 import pandas as pd
 import sqlite3
-from datetime import datetime
+from datetime import datetime, date
 import os
 import json
-import uuid
+import orjson
+import xlsxwriter
+import io
+import hashlib
 import numpy as np
 import time
 import threading
+import queue
+import atexit
+import socket
+import logging
+import logging.handlers
 from contextlib import contextmanager
+from itertools import chain, repeat
+
+class OrjsonProvider(JSONProvider):
+    """jsonify() backed by orjson: compact, unsorted and much faster than the stdlib encoder"""
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, option=self.option), mimetype='application/json')
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app, resources={r"/*": {"origins": "*", "allow_headers": "*", "methods": "*"}})
 
+# Compress JSON and HTML responses over 1KB (brotli when the client accepts it);
+# streamed downloads are compressed chunk by chunk as they are generated
+app.config.update(
+    COMPRESS_MIMETYPES=['application/json', 'text/html'],
+    COMPRESS_LEVEL=5,
+    COMPRESS_MIN_SIZE=1024,
+    COMPRESS_ALGORITHM=['br', 'gzip', 'deflate'],
+)
+Compress(app)
+
 # Modern Config
 @app.route('/')
 def serve_index():
@@ -24,69 +60,208 @@ def serve_legacy():
     return send_file('vocabulary_app.html')
 
 DB_FILE = 'vocabulary.db'
-EXCEL_FILE = 'vocabulary_all.xlsx'
 UPLOAD_FOLDER = 'uploads'
-ALLOWED_EXTENSIONS = {'xlsx', 'xls'}
-
-# Database lock for thread safety
-db_lock = threading.RLock()
+_ALLOWED_SUFFIXES = ('.xlsx', '.xls')
+
+# Logging goes through a queue so handler I/O happens off the request thread
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_log_records = queue.Queue(-1)
+logger.addHandler(logging.handlers.QueueHandler(_log_records))
+_log_listener = logging.handlers.QueueListener(_log_records, logging.StreamHandler())
+_log_listener.start()
+atexit.register(_log_listener.stop)
 
 # Create uploads folder if it doesn't exist
 if not os.path.exists(UPLOAD_FOLDER):
     os.makedirs(UPLOAD_FOLDER)
 
+# SQLite waits this long for a lock before raising "database is locked"
+BUSY_TIMEOUT_MS = 30000
+
+# Each thread keeps its connections open across requests
+_local = threading.local()
+
+# Every pooled connection by (thread, kind), so they can be closed at exit
+_pool = {}
+_pool_lock = threading.Lock()
+
+def _open_connection(readonly=False):
+    """Open a connection, applying its PRAGMAs once"""
+    if readonly:
+        # Read-only connections never take the write lock, so under WAL
+        # they run alongside a writer instead of queueing behind it
+        conn = sqlite3.connect(f'file:{DB_FILE}?mode=ro', uri=True, timeout=30,
+                               check_same_thread=False, cached_statements=256)
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        conn.execute('PRAGMA query_only=1')  # Refuse writes even to temp tables
+        conn.execute('PRAGMA cache_size=-65536')  # Same 64MB page cache as the writer
+        conn.execute('PRAGMA mmap_size=268435456')
+    else:
+        conn = sqlite3.connect(
+            DB_FILE, 
+            timeout=30,  # 30 second timeout
+            check_same_thread=False,  # Allow multi-threaded access
+            cached_statements=256  # Room for every statement the endpoints use
+        )
+        # Per-connection settings only; journal_mode is set once in init_db
+        conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+        conn.execute('PRAGMA synchronous=NORMAL')  # WAL stays consistent; skips the per-commit fsync
+        conn.execute('PRAGMA temp_store=MEMORY')
+        conn.execute('PRAGMA cache_size=-65536')  # 64MB page cache
+        conn.execute('PRAGMA mmap_size=268435456')  # Read through a 256MB memory map
+        # REPLACE conflict deletes must fire the stats triggers too
+        conn.execute('PRAGMA recursive_triggers=ON')
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _register_connection(attr, conn):
+    """Track a new pooled connection, closing those of finished threads"""
+    with _pool_lock:
+        for key in [k for k in _pool if not k[0].is_alive()]:
+            _pool.pop(key).close()
+        _pool[(threading.current_thread(), attr)] = conn
+
+@atexit.register
+def close_db_connections():
+    """Close every pooled connection when the process exits"""
+    with _pool_lock:
+        for conn in _pool.values():
+            conn.close()
+        _pool.clear()
+
 @contextmanager
-def get_db_connection():
-    """Context manager for database connections with timeout and retry"""
-    conn = None
-    retries = 3
-    for attempt in range(retries):
-        try:
-            conn = sqlite3.connect(
-                DB_FILE, 
-                timeout=30,  # 30 second timeout
-                check_same_thread=False  # Allow multi-threaded access
-            )
-            # Enable WAL mode for better concurrency
-            conn.execute('PRAGMA journal_mode=WAL')
-            conn.execute('PRAGMA busy_timeout=5000')  # 5 second busy timeout
-            conn.row_factory = sqlite3.Row
-            yield conn
-            break
-        except sqlite3.OperationalError as e:
-            if "locked" in str(e) and attempt < retries - 1:
-                time.sleep(0.1 * (attempt + 1))  # Exponential backoff
-                continue
-            else:
-                raise e
-        finally:
-            if conn:
-                conn.close()
+def get_db_connection(readonly=False):
+    """Context manager yielding this thread's cached connection"""
+    attr = 'readonly_conn' if readonly else 'conn'
+    conn = getattr(_local, attr, None)
+    if conn is None:
+        conn = _open_connection(readonly)
+        setattr(_local, attr, conn)
+        _register_connection(attr, conn)
+    try:
+        yield conn
+    finally:
+        if conn.in_transaction:
+            conn.rollback()
+
+@app.teardown_appcontext
+def release_db_connections(exc):
+    """Roll back anything a request left open but keep the connections alive"""
+    for attr in ('conn', 'readonly_conn'):
+        conn = getattr(_local, attr, None)
+        if conn is not None and conn.in_transaction:
+            conn.rollback()
 
 @contextmanager
-def get_db_cursor():
-    """Context manager for database operations with thread safety"""
-    with db_lock:
-        with get_db_connection() as conn:
-            cursor = conn.cursor()
-            try:
-                yield cursor, conn
-                conn.commit()
-            except Exception as e:
-                conn.rollback()
-                raise e
+def get_db_cursor(write=False, readonly=False):
+    """Context manager for database operations.
+
+    Concurrency is left to SQLite: WAL lets readers run alongside the single
+    writer, and write=True takes the write lock with BEGIN IMMEDIATE so writers
+    queue on busy_timeout instead of failing mid-transaction.
+    """
+    with get_db_connection(readonly=readonly) as conn:
+        cursor = conn.cursor()
+        try:
+            if write:
+                cursor.execute('BEGIN IMMEDIATE')
+            yield cursor, conn
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            if isinstance(e, sqlite3.OperationalError) and 'locked' in str(e):
+                logger.warning("⚠️ Database still busy after %dms: %s", BUSY_TIMEOUT_MS, e)
+            raise e
+
+def iso_now():
+    """Current local time in the ISO-8601 form every stored timestamp uses"""
+    return datetime.now().isoformat()
 
 def allowed_file(filename):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
+    return filename.lower().endswith(_ALLOWED_SUFFIXES)
 
     
 
 
 
 
+# Bookkeeping statements shared by several endpoints; one SQL string each keeps
+# them to a single entry in the connection's prepared-statement cache
+DEVICE_UPSERT_SQL = '''
+    INSERT OR REPLACE INTO devices 
+    (device_id, device_name, last_sync, last_ip)
+    VALUES (?, ?, ?, ?)
+'''
+
+IMPORT_LOG_INSERT_SQL = '''
+    INSERT INTO import_log 
+    (filename, device_id, total_rows, imported_rows, skipped_rows, status, error_message)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+
+SYNC_LOG_INSERT_SQL = '''
+    INSERT INTO sync_log (device_id, action, details)
+    VALUES (?, ?, ?)
+'''
+
+# Audit rows the client does not wait on are queued and written in batches by a
+# background thread, outside the request's transaction
+SYNC_LOG_BATCH = 1000
+SYNC_LOG_FLUSH_INTERVAL = 0.25  # seconds
+_sync_log_queue = queue.Queue()
+_sync_log_writer = None
+_sync_log_writer_lock = threading.Lock()
+
+def queue_sync_log(device_id, action, details):
+    """Queue a sync_log row, starting the writer thread on first use"""
+    global _sync_log_writer
+    # Started lazily so a forked worker gets its own thread
+    with _sync_log_writer_lock:
+        if _sync_log_writer is None or not _sync_log_writer.is_alive():
+            _sync_log_writer = threading.Thread(target=_sync_log_loop, name='sync-log-writer', daemon=True)
+            _sync_log_writer.start()
+    _sync_log_queue.put((device_id, action, details))
+
+def flush_sync_log():
+    """Write up to SYNC_LOG_BATCH queued rows in one transaction; returns how many"""
+    rows = []
+    while len(rows) < SYNC_LOG_BATCH:
+        try:
+            rows.append(_sync_log_queue.get_nowait())
+        except queue.Empty:
+            break
+    if rows:
+        with get_db_cursor(write=True) as (c, conn):
+            c.executemany(SYNC_LOG_INSERT_SQL, rows)
+    return len(rows)
+
+def _sync_log_loop():
+    while True:
+        time.sleep(SYNC_LOG_FLUSH_INTERVAL)
+        try:
+            while flush_sync_log() == SYNC_LOG_BATCH:
+                pass
+        except Exception as e:
+            logger.warning("⚠️ Could not write sync log: %s", e)
+
+@atexit.register
+def drain_sync_log():
+    """Write whatever is still queued; registered after close_db_connections so it runs first"""
+    try:
+        while flush_sync_log():
+            pass
+    except Exception as e:
+        logger.warning("⚠️ Could not write sync log: %s", e)
+
 def init_db():
     """Initialize database with proper table creation"""
-    with get_db_cursor() as (c, conn):
+    # WAL is persistent on the database file, so enabling it once is enough
+    with get_db_connection() as conn:
+        conn.execute('PRAGMA journal_mode=WAL')
+    
+    with get_db_cursor(write=True) as (c, conn):
         # Words table with unique constraint
         c.execute('''
             CREATE TABLE IF NOT EXISTS words (
@@ -114,6 +289,12 @@ def init_db():
         except:
             pass
         
+        # Indexes for the active-word listing/counts and per-device word lookups
+        c.execute("CREATE INDEX IF NOT EXISTS idx_words_deleted_date ON words (is_deleted, date_added DESC)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_words_device_deleted_word ON words (device_id, is_deleted, word)")
+        # Sync deletes match on id OR original_id; only edited copies carry an original_id
+        c.execute("CREATE INDEX IF NOT EXISTS idx_words_original ON words (original_id) WHERE original_id IS NOT NULL")
+        
         c.execute('''
             CREATE TABLE IF NOT EXISTS devices (
                 device_id TEXT PRIMARY KEY,
@@ -187,6 +368,44 @@ def init_db():
                 details TEXT
             )
         ''')
+        # Per-device history and the all-devices newest-first listings
+        c.execute("CREATE INDEX IF NOT EXISTS idx_qr_device_ts ON quiz_results (device_id, timestamp DESC)")
+        c.execute("CREATE INDEX IF NOT EXISTS idx_qr_ts ON quiz_results (timestamp DESC)")
+        # Each device's quizzes best-first, in the leaderboard's ranking order
+        c.execute("CREATE INDEX IF NOT EXISTS idx_qr_dev_score ON quiz_results (device_id, score DESC, accuracy DESC)")
+        
+        # Quizzes per device per day, so the today counts are a point lookup.
+        # A trigger keeps it current for every app writing this database (the
+        # API server shares it); the counts are rebuilt from quiz_results
+        # whenever the trigger is first installed
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS quiz_daily_counters (
+                device_id TEXT,
+                quiz_date TEXT,
+                count INTEGER DEFAULT 0,
+                PRIMARY KEY (device_id, quiz_date)
+            )
+        ''')
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = 'trg_quiz_daily_count'")
+        if c.fetchone() is None:
+            c.execute('DELETE FROM quiz_daily_counters')
+            c.execute('''
+                INSERT INTO quiz_daily_counters (device_id, quiz_date, count)
+                SELECT device_id, DATE(timestamp), COUNT(*) 
+                FROM quiz_results 
+                WHERE timestamp IS NOT NULL
+                GROUP BY device_id, DATE(timestamp)
+            ''')
+            c.execute('''
+                CREATE TRIGGER trg_quiz_daily_count
+                AFTER INSERT ON quiz_results
+                WHEN NEW.timestamp IS NOT NULL
+                BEGIN
+                    INSERT INTO quiz_daily_counters (device_id, quiz_date, count)
+                    VALUES (NEW.device_id, DATE(NEW.timestamp), 1)
+                    ON CONFLICT(device_id, quiz_date) DO UPDATE SET count = count + 1;
+                END
+            ''')
         
         c.execute('''
             CREATE TABLE IF NOT EXISTS quiz_settings (
@@ -217,10 +436,50 @@ def init_db():
             )
         ''')
         
+        # Running counters kept up to date by triggers, so /api/status never scans words
+        c.execute('''
+            CREATE TABLE IF NOT EXISTS stats (
+                key TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS words_stats_insert AFTER INSERT ON words
+            WHEN NEW.is_deleted IS 0
+            BEGIN
+                UPDATE stats SET value = value + 1 WHERE key = 'total_words';
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS words_stats_delete AFTER DELETE ON words
+            WHEN OLD.is_deleted IS 0
+            BEGIN
+                UPDATE stats SET value = value - 1 WHERE key = 'total_words';
+            END
+        ''')
+        c.execute('''
+            CREATE TRIGGER IF NOT EXISTS words_stats_update AFTER UPDATE OF is_deleted ON words
+            WHEN (NEW.is_deleted IS 0) != (OLD.is_deleted IS 0)
+            BEGIN
+                UPDATE stats SET value = value + (NEW.is_deleted IS 0) - (OLD.is_deleted IS 0)
+                WHERE key = 'total_words';
+            END
+        ''')
+        # Recount on startup so the counter can never stay out of step
+        c.execute('''
+            INSERT OR REPLACE INTO stats (key, value)
+            SELECT 'total_words', COUNT(*) FROM words WHERE is_deleted = 0
+        ''')
+        
+        # Gather planner statistics once so the new indexes get picked up
+        c.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+        if not c.fetchone():
+            c.execute('ANALYZE')
+        
         # Create temp tables for better performance
         c.execute('PRAGMA optimize')
         
-    print("✅ Database initialized with thread-safe connections")
+    logger.info("✅ Database initialized with thread-safe connections")
 
 # Quiz Results Database Table - REMOVE THIS SEPARATE FUNCTION
 # The init_quiz_tables() function is not needed anymore since tables are created in init_db()
@@ -238,13 +497,23 @@ def init_db():
 
 
 
+CORS_HEADERS = {
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization, Accept',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+    'Access-Control-Allow-Credentials': 'true',
+    'Access-Control-Max-Age': '86400'
+}
+
+@app.before_request
+def cors_preflight():
+    """Answer every CORS preflight here, before any view runs"""
+    if request.method == 'OPTIONS':
+        return '', 204
+
 @app.after_request
 def after_request(response):
-    response.headers.add('Access-Control-Allow-Origin', '*')
-    response.headers.add('Access-Control-Allow-Headers', 'Content-Type, Authorization, Accept')
-    response.headers.add('Access-Control-Allow-Methods', 'GET, POST, PUT, DELETE, OPTIONS')
-    response.headers.add('Access-Control-Allow-Credentials', 'true')
-    response.headers.add('Access-Control-Max-Age', '86400')
+    response.headers.update(CORS_HEADERS)
     return response
 
 
@@ -253,31 +522,59 @@ def after_request(response):
 def favicon():
     return '', 204
 
+# Every column of the words table, in table order
+WORD_COLUMNS = (
+    'id', 'word', 'meaning_bangla', 'meaning_english', 'synonyms', 'example_sentence',
+    'category', 'date_added', 'device_id', 'last_synced', 'is_deleted', 'is_edited',
+    'original_id', 'sync_status'
+)
+
+# Rows fetched per batch while streaming /api/download_all
+DOWNLOAD_BATCH = 500
+
+def start_stream(chunks):
+    """Run a streaming generator up to its first chunk before the response starts.
+
+    The generators execute their query and fetch the first batch before yielding,
+    so a database error is raised here, inside the view's try, and becomes a 500
+    instead of a 200 with truncated JSON.
+    """
+    head = next(chunks)
+    return stream_with_context(chain([head], chunks))
+
 @app.route('/api/download_all', methods=['GET', 'OPTIONS'])
 def download_all_words():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
-        with get_db_cursor() as (c, conn):
-            c.execute("SELECT * FROM words WHERE is_deleted = 0 ORDER BY date_added DESC")
-            words = []
-            columns = [column[0] for column in c.description]
-            for row in c.fetchall():
-                words.append(dict(zip(columns, row)))
-            
-            return jsonify({
-                "status": "success",
-                "words": words,
-                "count": len(words)
-            })
+        # Optional ?fields=a,b whitelist and ?limit=&offset= paging
+        fields = [f for f in request.args.get('fields', '').split(',') if f in WORD_COLUMNS] or WORD_COLUMNS
+        limit = request.args.get('limit', type=int)
+        offset = request.args.get('offset', 0, type=int)
+        
+        query = f"SELECT {', '.join(fields)} FROM words WHERE is_deleted = 0 ORDER BY date_added DESC"
+        params = ()
+        if limit is not None or offset:
+            query += " LIMIT ? OFFSET ?"
+            params = (limit if limit is not None else -1, offset)
+        
+        def generate():
+            # Rows are encoded a batch at a time, so memory stays flat however many words there are
+            with get_db_cursor(readonly=True) as (c, conn):
+                c.execute(query, params)
+                rows = c.fetchmany(DOWNLOAD_BATCH)
+                yield '{"status":"success","words":['
+                count = 0
+                while rows:
+                    chunk = b','.join(orjson.dumps(dict(row)) for row in rows)
+                    yield (b',' if count else b'') + chunk
+                    count += len(rows)
+                    rows = c.fetchmany(DOWNLOAD_BATCH)
+                yield f'],"count":{count}}}'
+        
+        return Response(start_stream(generate()), mimetype='application/json')
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 @app.route('/api/words/add', methods=['POST', 'OPTIONS'])
 def add_word():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         data = request.json
         word = data.get('word', '').strip()
@@ -292,9 +589,9 @@ def add_word():
             return jsonify({"status": "error", "message": "All fields (Word, Bangla, English, Synonyms, Example) are required"}), 400
             
         device_id = data.get('device_id', 'unknown')
-        current_time = datetime.now().isoformat()
+        current_time = iso_now()
         
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             # Check if word exists
             c.execute("SELECT id FROM words WHERE word = ? AND device_id = ? AND is_deleted = 0", (word, device_id))
             if c.fetchone():
@@ -336,9 +633,6 @@ def add_word():
 
 @app.route('/api/words/edit', methods=['POST', 'OPTIONS'])
 def edit_word():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         data = request.json
         word_id = data.get('id')
@@ -346,7 +640,7 @@ def edit_word():
         if not word_id:
             return jsonify({"status": "error", "message": "Word ID is required"}), 400
 
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             c.execute('''
                 UPDATE words
                 SET word = ?, meaning_bangla = ?, meaning_english = ?, synonyms = ?, 
@@ -359,7 +653,7 @@ def edit_word():
                 data.get('synonyms'),
                 data.get('example_sentence'),
                 data.get('category'),
-                datetime.now().isoformat(),
+                iso_now(),
                 word_id
             ))
             return jsonify({"status": "success", "message": "Word updated successfully"})
@@ -368,9 +662,6 @@ def edit_word():
 
 @app.route('/api/words/delete', methods=['POST', 'OPTIONS'])
 def delete_word():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         data = request.json
         word_id = data.get('id')
@@ -378,35 +669,28 @@ def delete_word():
         if not word_id:
             return jsonify({"status": "error", "message": "Word ID is required"}), 400
 
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             c.execute('UPDATE words SET is_deleted = 1, last_synced = ? WHERE id = ?', 
-                     (datetime.now().isoformat(), word_id))
+                     (iso_now(), word_id))
             return jsonify({"status": "success", "message": "Word deleted successfully"})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/test', methods=['GET', 'OPTIONS'])
 def test_connection():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     return jsonify({
         "status": "success",
         "message": "Vocabulary Pro Server is running!",
-        "timestamp": datetime.now().isoformat(),
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": datetime.now(),
         "version": "4.3",
         "database": "thread-safe"
     })
 
 @app.route('/api/status', methods=['GET', 'OPTIONS'])
 def get_status():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
-        with get_db_cursor() as (c, conn):
-            c.execute("SELECT COUNT(*) FROM words WHERE is_deleted = 0")
+        with get_db_cursor(readonly=True) as (c, conn):
+            c.execute("SELECT value FROM stats WHERE key = 'total_words'")
             total_words = c.fetchone()[0]
             
             c.execute("SELECT COUNT(DISTINCT device_id) FROM devices")
@@ -425,7 +709,7 @@ def get_status():
                 "device_count": device_count,
                 "category_count": category_count,
                 "last_sync": last_sync,
-                "server_time": datetime.now().isoformat(),
+                "server_time": datetime.now(),
                 "thread_safe": True
             })
             
@@ -434,23 +718,21 @@ def get_status():
 
 @app.route('/api/analytics', methods=['GET', 'OPTIONS'])
 def get_analytics():
-    if request.method == 'OPTIONS':
-        return '', 200
         
     try:
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(readonly=True) as (c, conn):
             # Total Words
             c.execute("SELECT COUNT(*) FROM words WHERE is_deleted = 0")
             total_words = c.fetchone()[0]
             
             # Words per Category
             c.execute('''
-                SELECT category, COUNT(*) as count 
+                SELECT category AS name, COUNT(*) as count 
                 FROM words 
                 WHERE is_deleted = 0 
                 GROUP BY category
             ''')
-            category_stats = [{"name": row[0], "count": row[1]} for row in c.fetchall()]
+            category_stats = [dict(row) for row in c.fetchall()]
             
             # Quiz Stats (Mock for now or real if available)
             # Try/Except in case table empty or error
@@ -468,25 +750,46 @@ def get_analytics():
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# Categories change rarely, so the list is cached in-process for a short TTL
+CATEGORIES_TTL = 60
+_categories_cache = {"data": None, "ts": 0.0, "generation": 0}
+_categories_lock = threading.Lock()
+
+def invalidate_categories_cache():
+    """Drop the cached list; writers call this after their commit.
+
+    The generation bump stops a reader that queried before the commit from
+    storing the old list afterwards.
+    """
+    with _categories_lock:
+        _categories_cache["data"] = None
+        _categories_cache["generation"] += 1
+
 @app.route('/api/categories', methods=['GET', 'OPTIONS'])
 def get_categories():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
-        with get_db_cursor() as (c, conn):
+        with _categories_lock:
+            categories = _categories_cache["data"]
+            fresh = time.time() - _categories_cache["ts"] < CATEGORIES_TTL
+            generation = _categories_cache["generation"]
+        if categories is not None and fresh:
+            return jsonify(categories)
+        
+        with get_db_cursor(readonly=True) as (c, conn):
             c.execute("SELECT name, color, is_default FROM categories ORDER BY name")
             categories = [{"name": row[0], "color": row[1], "is_default": bool(row[2])} 
                          for row in c.fetchall()]
-            return jsonify(categories)
+        
+        with _categories_lock:
+            if _categories_cache["generation"] == generation:
+                _categories_cache["data"] = categories
+                _categories_cache["ts"] = time.time()
+        return jsonify(categories)
     except Exception as e:
         return jsonify({"error": str(e)})
 
 @app.route('/api/categories/add', methods=['POST', 'OPTIONS'])
 def add_category():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         data = request.json
         name = data.get('name', '').strip()
@@ -495,16 +798,19 @@ def add_category():
         if not name:
             return jsonify({"status": "error", "message": "Category name required"}), 400
         
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             c.execute('''
                 INSERT OR IGNORE INTO categories (name, color, is_default)
                 VALUES (?, ?, 0)
             ''', (name, color))
-            
-            if c.rowcount == 0:
-                return jsonify({"status": "error", "message": "Category already exists"}), 400
-            
-            return jsonify({"status": "success", "message": f"Category '{name}' added"})
+            added = c.rowcount > 0
+        
+        if not added:
+            return jsonify({"status": "error", "message": "Category already exists"}), 400
+        
+        # Cleared after the commit so a concurrent reader cannot re-cache the old list
+        invalidate_categories_cache()
+        return jsonify({"status": "success", "message": f"Category '{name}' added"})
         
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -534,8 +840,6 @@ def add_category():
 
 @app.route('/api/categories/edit', methods=['POST', 'OPTIONS'])
 def edit_category():
-    if request.method == 'OPTIONS':
-        return '', 200
         
     try:
         data = request.json
@@ -545,21 +849,19 @@ def edit_category():
         if not old_name or not new_name:
             return jsonify({"status": "error", "message": "Both old and new names requested"}), 400
 
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             # Update category name
             c.execute("UPDATE categories SET name = ? WHERE name = ?", (new_name, old_name))
             # Update associated words
             c.execute("UPDATE words SET category = ? WHERE category = ?", (new_name, old_name))
-            
-            return jsonify({"status": "success", "message": "Category updated"})
+        
+        invalidate_categories_cache()
+        return jsonify({"status": "success", "message": "Category updated"})
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/categories/delete', methods=['POST', 'OPTIONS'])
 def delete_category():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         data = request.json
         name = data.get('name', '').strip()
@@ -567,7 +869,7 @@ def delete_category():
         if not name:
             return jsonify({"status": "error", "message": "Category name required"}), 400
         
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             # Check if it's a default category
             c.execute("SELECT is_default FROM categories WHERE name = ?", (name,))
             result = c.fetchone()
@@ -589,11 +891,12 @@ def delete_category():
             
             # Delete category
             c.execute("DELETE FROM categories WHERE name = ?", (name,))
-            
-            return jsonify({
-                "status": "success", 
-                "message": f"Category deleted. {moved_count} words moved to General Vocabulary."
-            })
+        
+        invalidate_categories_cache()
+        return jsonify({
+            "status": "success", 
+            "message": f"Category deleted. {moved_count} words moved to General Vocabulary."
+        })
         
     except Exception as e:
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -601,31 +904,21 @@ def delete_category():
 @app.route('/api/deleted_words', methods=['GET', 'OPTIONS'])
 def get_deleted_words():
     """Get list of deleted word IDs"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(readonly=True) as (c, conn):
             c.execute('''
-                SELECT id, word, device_id, last_synced 
+                SELECT id AS server_id, word, device_id, last_synced AS deleted_at 
                 FROM words 
                 WHERE is_deleted = 1
                 ORDER BY last_synced DESC
             ''')
             
-            deleted_words = []
-            for row in c.fetchall():
-                deleted_words.append({
-                    'server_id': row[0],
-                    'word': row[1],
-                    'device_id': row[2],
-                    'deleted_at': row[3]
-                })
+            deleted_words = [dict(row) for row in c.fetchall()]
             
             return jsonify(deleted_words)
         
     except Exception as e:
-        print(f"Error getting deleted words: {e}")
+        logger.error("Error getting deleted words: %s", e)
         return jsonify({"error": str(e)}), 500
 
 
@@ -638,12 +931,44 @@ def get_deleted_words():
 
 
 
+# Word fields read from an import file besides the word itself
+# and the value stored when the file has no column for them
+IMPORT_FIELDS = {
+    'meaning_bangla': '',
+    'meaning_english': '',
+    'synonyms': '',
+    'example_sentence': '',
+    'category': 'General Vocabulary'
+}
+
+# Headers recognised as the word column (compared lowercased)
+WORD_COLUMN_NAMES = ('word', 'vocabulary', 'term', 'english word', 'word/phrase', 'words')
+
+# New words are inserted and a live word the device already has is updated in place.
+# A soft-deleted word is re-added as new (fresh date_added, not edited), as
+# api/server.py's import does; it used to fail on idx_word_device and be skipped.
+# Every SET reads the row's values from before the update
+IMPORT_UPSERT_SQL = '''
+    INSERT INTO words 
+    (word, meaning_bangla, meaning_english, synonyms, example_sentence, 
+     category, date_added, device_id, last_synced, is_deleted, sync_status)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0, 'pending')
+    ON CONFLICT(word, device_id) DO UPDATE SET
+        meaning_bangla = excluded.meaning_bangla,
+        meaning_english = excluded.meaning_english,
+        synonyms = excluded.synonyms,
+        example_sentence = excluded.example_sentence,
+        category = excluded.category,
+        date_added = CASE WHEN is_deleted THEN excluded.date_added ELSE date_added END,
+        last_synced = excluded.last_synced,
+        sync_status = 'pending',
+        is_edited = CASE WHEN is_deleted THEN 0 ELSE 1 END,
+        is_deleted = 0
+'''
+
 @app.route('/api/import_excel', methods=['POST', 'OPTIONS'])
 def import_excel():
     """Import words from Excel file"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         # Check if file was uploaded
         if 'file' not in request.files:
@@ -672,52 +997,34 @@ def import_excel():
         device_id = request.form.get('device_id', 'unknown')
         device_name = request.form.get('device_name', f"Device-{device_id[:8]}")
         
-        # Save file temporarily
-        filename = f"{uuid.uuid4().hex}_{file.filename}"
-        filepath = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(filepath)
-        
-        # Read Excel file with proper NaN handling
+        # Read the upload straight from the request stream, with proper NaN handling
         try:
-            df = pd.read_excel(filepath, keep_default_na=False)
+            try:
+                # Rust-backed calamine parser (pandas >= 2.2 with python-calamine installed)
+                df = pd.read_excel(file.stream, engine='calamine', keep_default_na=False)
+            except (ImportError, ValueError):
+                # Engine unavailable or file rejected - fall back to the default reader
+                file.stream.seek(0)
+                df = pd.read_excel(file.stream, keep_default_na=False)
             # Replace any remaining NaN or NaT with empty string
             df = df.replace([np.nan, pd.NaT], '')
         except Exception as e:
-            # Clean up file
-            if os.path.exists(filepath):
-                os.remove(filepath)
             return jsonify({
                 "status": "error", 
                 "message": f"Failed to read Excel file: {str(e)}"
             }), 400
         
-        # Clean up uploaded file
-        if os.path.exists(filepath):
-            os.remove(filepath)
-        
         # Standardize column names - remove extra spaces, convert to lowercase for matching
         df.columns = [str(col).strip() for col in df.columns]
         
-        # Debug: Print column names
-        print(f"📊 Excel columns found: {list(df.columns)}")
-        print(f"📊 First few rows for debugging:")
-        print(df.head())
-        
-        # Find word column - more flexible matching
-        word_column = None
-        possible_word_columns = ['word', 'Word', 'WORD', 'Vocabulary', 'vocabulary', 
-                                'Term', 'term', 'English Word', 'english word', 'Word/Phrase',
-                                'word/phrase', 'Words', 'words']
-        
-        for col in df.columns:
-            col_lower = col.lower().strip()
-            for possible in possible_word_columns:
-                if possible.lower() in col_lower or col_lower in possible.lower():
-                    word_column = col
-                    print(f"✅ Found word column: '{col}' (matched as '{word_column}')")
-                    break
-            if word_column:
-                break
+        logger.debug("📊 Excel columns found: %s", list(df.columns))
+        
+        # Find word column - exact names first, then the looser substring match
+        cols_lower = {col.lower(): col for col in df.columns}
+        word_column = next((cols_lower[name] for name in WORD_COLUMN_NAMES if name in cols_lower), None)
+        if not word_column:
+            word_column = next((col for col_lower, col in cols_lower.items()
+                                if any(name in col_lower or col_lower in name for name in WORD_COLUMN_NAMES)), None)
         
         if not word_column:
             return jsonify({
@@ -725,196 +1032,58 @@ def import_excel():
                 "message": f"Excel file must have a 'Word' column. Found columns: {list(df.columns)}"
             }), 400
         
-        # SIMPLIFIED COLUMN MAPPING - Use exact column names since we know them
-        column_mapping = {}
-        
-        # Look for EXACT column matches first (case-insensitive)
-        column_names_lower = [col.lower() for col in df.columns]
-        
-        # Define priority mappings - exact matches first
-        exact_mappings = {
-            'meaning_bangla': ['meaning_bangla', 'bangla', 'bengali', 'bangla meaning', 'meaning in bangla'],
-            'meaning_english': ['meaning_english', 'english', 'english meaning', 'meaning in english', 'definition'],
-            'synonyms': ['synonyms', 'synonym'],
-            'example_sentence': ['example_sentence', 'example', 'sentence'],
-            'category': ['category', 'categories']
+        logger.debug("✅ Found word column: '%s'", word_column)
+        
+        def first_column(terms, exclude=None):
+            """First column whose lowercased name contains one of terms"""
+            return next((col for col_lower, col in cols_lower.items()
+                         if any(term in col_lower for term in terms)
+                         and not (exclude and exclude in col_lower)), None)
+        
+        # Preferred match for each field, with a fallback on looser terms
+        candidates = {
+            'meaning_bangla': first_column(('bangla',)) or first_column(('bengali', 'translation', 'মানে')),
+            'meaning_english': (first_column(('english',), exclude='bangla')
+                                or first_column(('definition', 'meaning', 'explanation'), exclude='bangla')),
+            'synonyms': cols_lower.get('synonyms'),
+            'example_sentence': first_column(('example',)),
+            'category': cols_lower.get('category')
         }
+        column_mapping = {field: col for field, col in candidates.items() if col}
+        logger.debug("📊 Final column mapping: %s", column_mapping)
         
-        # First pass: Look for exact column name matches
-        for col in df.columns:
-            col_lower = col.lower()
-            
-            if col_lower == 'meaning_bangla' or col_lower == 'bangla' or 'bangla' in col_lower:
-                if 'meaning_bangla' not in column_mapping:
-                    column_mapping['meaning_bangla'] = col
-                    print(f"✅ Mapped Bangla: '{col}' → 'meaning_bangla'")
-            
-            if col_lower == 'meaning_english' or col_lower == 'english' or ('english' in col_lower and 'bangla' not in col_lower):
-                if 'meaning_english' not in column_mapping:
-                    column_mapping['meaning_english'] = col
-                    print(f"✅ Mapped English: '{col}' → 'meaning_english'")
-            
-            if col_lower == 'synonyms':
-                if 'synonyms' not in column_mapping:
-                    column_mapping['synonyms'] = col
-                    print(f"✅ Mapped Synonyms: '{col}' → 'synonyms'")
-            
-            if col_lower == 'example_sentence' or 'example' in col_lower:
-                if 'example_sentence' not in column_mapping:
-                    column_mapping['example_sentence'] = col
-                    print(f"✅ Mapped Example: '{col}' → 'example_sentence'")
-            
-            if col_lower == 'category':
-                if 'category' not in column_mapping:
-                    column_mapping['category'] = col
-                    print(f"✅ Mapped Category: '{col}' → 'category'")
-        
-        # Second pass: If we didn't find exact matches, try other patterns
-        if 'meaning_bangla' not in column_mapping:
-            for col in df.columns:
-                col_lower = col.lower()
-                if any(term in col_lower for term in ['bangla', 'bengali', 'translation', 'মানে']):
-                    column_mapping['meaning_bangla'] = col
-                    print(f"🔄 Alternative Bangla mapping: '{col}' → 'meaning_bangla'")
-                    break
-        
-        if 'meaning_english' not in column_mapping:
-            for col in df.columns:
-                col_lower = col.lower()
-                if any(term in col_lower for term in ['english', 'definition', 'meaning', 'explanation']) and 'bangla' not in col_lower:
-                    column_mapping['meaning_english'] = col
-                    print(f"🔄 Alternative English mapping: '{col}' → 'meaning_english'")
-                    break
+        # Normalize the mapped columns in one vectorized pass; fields the file
+        # lacks are the same for every row, so they never become columns
+        words = pd.DataFrame({'word': df[word_column].astype(str).str.strip()})
+        for field, col in column_mapping.items():
+            words[field] = df[col].astype(str).str.strip()
+        if 'category' in words:
+            words.loc[words['category'] == '', 'category'] = IMPORT_FIELDS['category']
         
-        print(f"📊 Final column mapping: {column_mapping}")
+        # Rows without a word are skipped; the rest get a capitalized word
+        words = words[words['word'] != '']
+        words['word'] = words['word'].str.title()
         
-        # Process each row
         total_rows = len(df)
-        imported_rows = 0
-        skipped_rows = 0
-        current_time = datetime.now().isoformat()
-        
-        # Process each row with batch commit
-        batch_size = 50
-        for i in range(0, len(df), batch_size):
-            batch = df.iloc[i:i+batch_size]
+        skipped_rows = total_rows - len(words)
+        current_time = iso_now()
+        
+        with get_db_cursor(write=True) as (c, conn):
+            # Parameter tuples straight from the columns, in IMPORT_UPSERT_SQL order
+            rows = list(zip(
+                words['word'],
+                *(words[field] if field in words else repeat(default) for field, default in IMPORT_FIELDS.items()),
+                repeat(current_time), repeat(device_id), repeat(current_time)
+            ))
+            c.executemany(IMPORT_UPSERT_SQL, rows)
+            imported_rows = len(rows)
             
-            with get_db_cursor() as (c, conn):
-                for index, row in batch.iterrows():
-                    try:
-                        # Get word (required)
-                        word = str(row[word_column]).strip()
-                        if not word:
-                            skipped_rows += 1
-                            continue
-                        
-                        # Get other fields - with default empty values
-                        meaning_bangla = ''
-                        if 'meaning_bangla' in column_mapping:
-                            meaning_bangla = str(row[column_mapping['meaning_bangla']]).strip()
-                        
-                        meaning_english = ''
-                        if 'meaning_english' in column_mapping:
-                            meaning_english = str(row[column_mapping['meaning_english']]).strip()
-                        
-                        synonyms = ''
-                        if 'synonyms' in column_mapping:
-                            synonyms = str(row[column_mapping['synonyms']]).strip()
-                        
-                        example = ''
-                        if 'example_sentence' in column_mapping:
-                            example = str(row[column_mapping['example_sentence']]).strip()
-                        
-                        category = ''
-                        if 'category' in column_mapping:
-                            category = str(row[column_mapping['category']]).strip()
-                        
-                        if not category:
-                            category = 'General Vocabulary'
-                        
-                        # Capitalize word
-                        word = word.title()
-                        
-                        # Debug first few
-                        if imported_rows < 3:
-                            print(f"🔍 Debug row {index}:")
-                            print(f"   Word: '{word}'")
-                            print(f"   Bangla from col '{column_mapping.get('meaning_bangla')}': '{meaning_bangla}'")
-                            print(f"   English from col '{column_mapping.get('meaning_english')}': '{meaning_english}'")
-                        
-                        # Check if word already exists from this device
-                        c.execute('''
-                            SELECT id, is_deleted FROM words 
-                            WHERE word = ? AND device_id = ? AND is_deleted = 0
-                        ''', (word, device_id))
-                        
-                        existing = c.fetchone()
-                        
-                        if existing:
-                            # Update existing word
-                            c.execute('''
-                                UPDATE words SET
-                                    meaning_bangla = ?,
-                                    meaning_english = ?,
-                                    synonyms = ?,
-                                    example_sentence = ?,
-                                    category = ?,
-                                    last_synced = ?,
-                                    sync_status = 'pending',
-                                    is_edited = 1
-                                WHERE id = ?
-                            ''', (
-                                meaning_bangla,
-                                meaning_english,
-                                synonyms,
-                                example,
-                                category,
-                                current_time,
-                                existing[0]
-                            ))
-                        else:
-                            # Insert new word
-                            c.execute('''
-                                INSERT INTO words 
-                                (word, meaning_bangla, meaning_english, synonyms, example_sentence, 
-                                 category, date_added, device_id, last_synced, is_deleted, sync_status)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
-                                word,
-                                meaning_bangla,
-                                meaning_english,
-                                synonyms,
-                                example,
-                                category,
-                                current_time,
-                                device_id,
-                                current_time,
-                                0,  # is_deleted
-                                'pending'
-                            ))
-                        
-                        imported_rows += 1
-                        
-                    except Exception as e:
-                        print(f"❌ Error importing row {index}: {e}")
-                        skipped_rows += 1
-                        continue
-        
-        # Finalize with device update
-        with get_db_cursor() as (c, conn):
+            # Bookkeeping rides in the same transaction, so the import is one commit
             # Update device info
-            c.execute('''
-                INSERT OR REPLACE INTO devices 
-                (device_id, device_name, last_sync, last_ip)
-                VALUES (?, ?, ?, ?)
-            ''', (device_id, device_name, current_time, request.remote_addr))
+            c.execute(DEVICE_UPSERT_SQL, (device_id, device_name, current_time, request.remote_addr))
             
             # Log import
-            c.execute('''
-                INSERT INTO import_log 
-                (filename, device_id, total_rows, imported_rows, skipped_rows, status, error_message)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            c.execute(IMPORT_LOG_INSERT_SQL, (
                 file.filename,
                 device_id,
                 total_rows,
@@ -925,12 +1094,9 @@ def import_excel():
             ))
             
             # Log sync
-            c.execute('''
-                INSERT INTO sync_log (device_id, action, details)
-                VALUES (?, ?, ?)
-            ''', (device_id, 'import', f'Imported {imported_rows} words from Excel file'))
+            c.execute(SYNC_LOG_INSERT_SQL, (device_id, 'import', f'Imported {imported_rows} words from Excel file'))
         
-        print(f"✅ Import completed: {imported_rows} imported, {skipped_rows} skipped")
+        logger.info("✅ Import completed: %d imported, %d skipped", imported_rows, skipped_rows)
         
         return jsonify({
             "status": "success",
@@ -946,16 +1112,12 @@ def import_excel():
         })
         
     except Exception as e:
-        print(f"❌ Import error: {e}")
+        logger.error("❌ Import error: %s", e)
         
         # Log error
         try:
             with get_db_cursor() as (c, conn):
-                c.execute('''
-                    INSERT INTO import_log 
-                    (filename, device_id, total_rows, imported_rows, skipped_rows, status, error_message)
-                    VALUES (?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                c.execute(IMPORT_LOG_INSERT_SQL, (
                     file.filename if 'file' in locals() else 'unknown',
                     device_id if 'device_id' in locals() else 'unknown',
                     0, 0, 0,
@@ -983,13 +1145,10 @@ def import_excel():
 @app.route('/api/import_history', methods=['GET', 'OPTIONS'])
 def get_import_history():
     """Get import history for a device"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         device_id = request.args.get('device_id', '')
         
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(readonly=True) as (c, conn):
             if device_id:
                 c.execute('''
                     SELECT id, filename, device_id, total_rows, imported_rows, skipped_rows, 
@@ -1008,19 +1167,7 @@ def get_import_history():
                     LIMIT 50
                 ''')
             
-            imports = []
-            for row in c.fetchall():
-                imports.append({
-                    "id": row[0],
-                    "filename": row[1],
-                    "device_id": row[2],
-                    "total_rows": row[3],
-                    "imported_rows": row[4],
-                    "skipped_rows": row[5],
-                    "timestamp": row[6],
-                    "status": row[7],
-                    "error_message": row[8]
-                })
+            imports = [dict(row) for row in c.fetchall()]
             
             return jsonify({
                 "status": "success",
@@ -1028,48 +1175,116 @@ def get_import_history():
             })
         
     except Exception as e:
-        print(f"Get import history error: {e}")
+        logger.error("Get import history error: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# Example rows shipped in the import template
+TEMPLATE_DATA = {
+    'Word': ['Example', 'Another Word', 'Test Word'],
+    'Meaning Bangla': ['উদাহরণ', 'অন্য শব্দ', 'পরীক্ষা শব্দ'],
+    'Meaning English': ['An illustration', 'Another term', 'Test term'],
+    'Synonyms': ['Sample, Instance', 'Alternative, Different', 'Trial, Experiment'],
+    'Example Sentence': ['This is an example sentence.', 'Here is another example.', 'Let\'s test this feature.'],
+    'Category': ['General Vocabulary', 'Phrase and Idioms', 'Technical Terms']
+}
+
+# Rendered import template, built on first request
+_template_bytes = None
+_template_etag = None
+
 @app.route('/api/import_template', methods=['GET', 'OPTIONS'])
 def download_import_template():
     """Download Excel import template"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
+    global _template_bytes, _template_etag
     try:
-        # Create template dataframe
-        template_data = {
-            'Word': ['Example', 'Another Word', 'Test Word'],
-            'Meaning Bangla': ['উদাহরণ', 'অন্য শব্দ', 'পরীক্ষা শব্দ'],
-            'Meaning English': ['An illustration', 'Another term', 'Test term'],
-            'Synonyms': ['Sample, Instance', 'Alternative, Different', 'Trial, Experiment'],
-            'Example Sentence': ['This is an example sentence.', 'Here is another example.', 'Let\'s test this feature.'],
-            'Category': ['General Vocabulary', 'Phrase and Idioms', 'Technical Terms']
-        }
-        
-        df = pd.DataFrame(template_data)
-        
-        # Save to file
-        template_path = os.path.join(UPLOAD_FOLDER, 'import_template.xlsx')
-        df.to_excel(template_path, index=False)
-        
+        # The template never changes, so it is rendered once per process
+        if _template_bytes is None:
+            buf = io.BytesIO()
+            pd.DataFrame(TEMPLATE_DATA).to_excel(buf, index=False, engine='xlsxwriter')
+            _template_etag = hashlib.sha1(buf.getvalue()).hexdigest()
+            _template_bytes = buf.getvalue()
+        
+        # The ETag lets browsers revalidate with a 304 instead of downloading again
         return send_file(
-            template_path,
+            io.BytesIO(_template_bytes),
             mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
             as_attachment=True,
-            download_name='vocabulary_import_template.xlsx'
+            download_name='vocabulary_import_template.xlsx',
+            etag=_template_etag
         )
         
     except Exception as e:
-        print(f"Template download error: {e}")
+        logger.error("Template download error: %s", e)
         return jsonify({"error": str(e)}), 500
 
+# Statements used by /api/sync, kept as constants so each is prepared once per connection
+SYNC_DELETE_BY_ID_SQL = '''
+    UPDATE words 
+    SET is_deleted = 1,
+        last_synced = ?,
+        sync_status = 'synced'
+    WHERE (id = ? OR original_id = ?) AND is_deleted = 0
+'''
+
+SYNC_DELETE_BY_WORD_SQL = '''
+    UPDATE words 
+    SET is_deleted = 1,
+        last_synced = ?,
+        sync_status = 'synced'
+    WHERE word = ? AND device_id = ? AND is_deleted = 0
+'''
+
+SYNC_RETIRE_ORIGINAL_SQL = '''
+    UPDATE words 
+    SET is_deleted = 1,
+        is_edited = 1,
+        last_synced = ?,
+        sync_status = 'synced'
+    WHERE id = ? AND is_deleted = 0
+'''
+
+# Deleted rows are returned too: (word, device_id) is unique, so a deleted
+# row still blocks inserting the same word again
+SYNC_EXISTING_SQL = '''
+    SELECT id, is_deleted, is_edited FROM words 
+    WHERE word = ? AND device_id = ?
+'''
+
+# Batched form of SYNC_EXISTING_SQL; same leading columns, word last
+SYNC_PREFETCH_SQL = '''
+    SELECT id, is_deleted, is_edited, word FROM words 
+    WHERE device_id = ? AND word IN ({})
+'''
+# Words per prefetch query, leaving room under SQLite's 999 variable limit
+SYNC_PREFETCH_CHUNK = 900
+
+SYNC_INSERT_PREFIX = '''
+    INSERT INTO words 
+    (word, meaning_bangla, meaning_english, synonyms, example_sentence, 
+     category, date_added, device_id, last_synced, is_deleted, is_edited, 
+     original_id, sync_status)
+    VALUES '''
+SYNC_INSERT_ROW = "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'synced')"
+SYNC_INSERT_SQL = SYNC_INSERT_PREFIX + SYNC_INSERT_ROW
+
+# New words per multi-row INSERT; 12 bound values a row stays under SQLite's 999 limit
+SYNC_INSERT_CHUNK = 75
+
+SYNC_UPDATE_SQL = '''
+    UPDATE words SET
+        meaning_bangla = ?,
+        meaning_english = ?,
+        synonyms = ?,
+        example_sentence = ?,
+        category = ?,
+        is_edited = ?,
+        last_synced = ?,
+        sync_status = 'synced'
+    WHERE id = ?
+'''
+
 @app.route('/api/sync', methods=['POST', 'OPTIONS'])
 def sync_words():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         data = request.json
         if not data:
@@ -1079,136 +1294,152 @@ def sync_words():
         device_name = data.get('device_name', f"Device-{device_id[:8]}")
         words = data.get('words', [])
         
-        current_time = datetime.now().isoformat()
+        current_time = iso_now()
         synced_count = 0
         server_ids = []
         
-        # Process words in smaller batches to avoid long transactions
-        batch_size = 20
-        for i in range(0, len(words), batch_size):
-            batch = words[i:i+batch_size]
-            
-            with get_db_cursor() as (c, conn):
-                for word in batch:
+        # Strip every word once and drop blanks. A deletion repeated since the last
+        # non-delete item is dropped too: only a non-delete can bring back a row a
+        # deletion matched, so the repeat would change nothing
+        items = []
+        seen_deletes = set()
+        for word in words:
+            word_text = word.get('word')
+            word_text = word_text.strip() if isinstance(word_text, str) else ''
+            if not word_text:
+                continue
+            if word.get('is_deleted', False):
+                key = (word_text, str(word.get('server_id')))
+                if key in seen_deletes:
+                    continue
+                seen_deletes.add(key)
+            else:
+                seen_deletes.clear()
+            items.append((word_text, word))
+        
+        # The whole sync is one write transaction: one lock, one commit
+        with get_db_cursor(write=True) as (c, conn):
+            # New words are queued and written with multi-row INSERTs, deletions by
+            # word and updates with executemany. Insert and update entries are
+            # (params, slot in server_ids). A word has at most one queued write, and
+            # the queues are flushed before any statement that could see the queued
+            # rows, so results match one-by-one processing
+            pending_inserts = []
+            pending_deletes = []
+            pending_updates = []
+            pending_words = set()
+            
+            def flush_pending():
+                nonlocal synced_count
+                if pending_deletes:
+                    # Each delete matches at most one row, so the summed rowcount
+                    # is the number of words actually deleted
+                    c.executemany(SYNC_DELETE_BY_WORD_SQL, pending_deletes)
+                    synced_count += c.rowcount
+                    pending_deletes.clear()
+                if pending_updates:
+                    c.execute('SAVEPOINT sync_updates')
                     try:
-                        server_id = word.get('server_id')
-                        is_deleted = word.get('is_deleted', False)
-                        is_edited = word.get('is_edited', False)
-                        word_text = word.get('word', '').strip()
-                        
-                        if not word_text:
-                            continue
-                        
-                        # Handle deletions from ANY device
-                        if is_deleted:
-                            if server_id:
-                                # Mark specific word as deleted by server_id
-                                c.execute('''
-                                    UPDATE words 
-                                    SET is_deleted = 1,
-                                        last_synced = ?,
-                                        sync_status = 'synced'
-                                    WHERE (id = ? OR original_id = ?) AND is_deleted = 0
-                                ''', (current_time, server_id, server_id))
-                            else:
-                                # Mark word as deleted by content and device_id
-                                c.execute('''
-                                    UPDATE words 
-                                    SET is_deleted = 1,
-                                        last_synced = ?,
-                                        sync_status = 'synced'
-                                    WHERE word = ? AND device_id = ? AND is_deleted = 0
-                                ''', (current_time, word_text, device_id))
-                            
-                            if c.rowcount > 0:
+                        c.executemany(SYNC_UPDATE_SQL, [params for params, _ in pending_updates])
+                        c.execute('RELEASE sync_updates')
+                    except sqlite3.Error:
+                        # Undo the partial batch and retry row by row so one bad word
+                        # does not sink the rest
+                        c.execute('ROLLBACK TO sync_updates')
+                        c.execute('RELEASE sync_updates')
+                        for params, slot in pending_updates:
+                            try:
+                                c.execute(SYNC_UPDATE_SQL, params)
+                            except Exception as e:
+                                logger.error("Error syncing word id %s: %s", params[-1], e)
+                                server_ids[slot] = None
+                                synced_count -= 1
+                    pending_updates.clear()
+                for start in range(0, len(pending_inserts), SYNC_INSERT_CHUNK):
+                    chunk = pending_inserts[start:start + SYNC_INSERT_CHUNK]
+                    try:
+                        c.execute(SYNC_INSERT_PREFIX + ', '.join([SYNC_INSERT_ROW] * len(chunk)),
+                                  [value for params, _ in chunk for value in params])
+                        # Rows of one INSERT get consecutive ids ending at lastrowid
+                        first_id = c.lastrowid - len(chunk) + 1
+                        for offset, (_, slot) in enumerate(chunk):
+                            server_ids[slot] = first_id + offset
+                    except sqlite3.Error:
+                        # Retry row by row so one bad word does not sink the rest
+                        for params, slot in chunk:
+                            try:
+                                c.execute(SYNC_INSERT_SQL, params)
+                                server_ids[slot] = c.lastrowid
+                            except Exception as e:
+                                logger.error("Error syncing word %s: %s", params[0], e)
+                                synced_count -= 1
+                pending_inserts.clear()
+                pending_words.clear()
+            
+            # Look up every word of the sync up front. known_rows maps word -> row
+            # (None if the device has no such word); a write that may change a word's
+            # row drops it from the map, and it is looked up again when next needed
+            word_texts = list({word_text for word_text, _ in items})
+            known_rows = dict.fromkeys(word_texts)
+            for start in range(0, len(word_texts), SYNC_PREFETCH_CHUNK):
+                chunk = word_texts[start:start + SYNC_PREFETCH_CHUNK]
+                c.execute(SYNC_PREFETCH_SQL.format(', '.join('?' * len(chunk))), (device_id, *chunk))
+                for row in c.fetchall():
+                    known_rows[row['word']] = row
+            
+            for word_text, word in items:
+                try:
+                    server_id = word.get('server_id')
+                    is_deleted = word.get('is_deleted', False)
+                    is_edited = word.get('is_edited', False)
+                    
+                    # Handle deletions from ANY device
+                    if is_deleted:
+                        if server_id:
+                            # Mark specific word as deleted by server_id (which may be a queued word)
+                            flush_pending()
+                            if c.execute(SYNC_DELETE_BY_ID_SQL, (current_time, server_id, server_id)).rowcount:
+                                known_rows.clear()
                                 synced_count += 1
-                            continue
-                        
-                        # For edited words - IMPORTANT FIX
-                        if is_edited:
-                            original_id = word.get('original_id')
-                            if original_id:
-                                # Mark original word as deleted and edited
-                                c.execute('''
-                                    UPDATE words 
-                                    SET is_deleted = 1,
-                                        is_edited = 1,
-                                        last_synced = ?,
-                                        sync_status = 'synced'
-                                    WHERE id = ? AND is_deleted = 0
-                                ''', (current_time, original_id))
-                        
-                        # For new/edited words - check if exists from this device
-                        c.execute('''
-                            SELECT id, is_deleted, is_edited, original_id FROM words 
-                            WHERE word = ? AND device_id = ? AND is_deleted = 0
-                        ''', (word_text, device_id))
-                        
-                        existing = c.fetchone()
-                        
-                        if existing:
-                            word_id = existing[0]
-                            is_existing_edited = existing[2]
-                            existing_original_id = existing[3]
-                            
-                            # For edited words, create a new entry
-                            if is_edited and not is_existing_edited:
-                                # Insert as new edited word with original_id reference
-                                c.execute('''
-                                    INSERT INTO words 
-                                    (word, meaning_bangla, meaning_english, synonyms, example_sentence, 
-                                     category, date_added, device_id, last_synced, is_deleted, is_edited, 
-                                     original_id, sync_status)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                                ''', (
-                                    word_text,
-                                    word.get('meaning_bangla', ''),
-                                    word.get('meaning_english', ''),
-                                    word.get('synonyms', ''),
-                                    word.get('example_sentence', ''),
-                                    word.get('category', 'General Vocabulary'),
-                                    word.get('timestamp', current_time),
-                                    device_id,
-                                    current_time,
-                                    0,  # is_deleted
-                                    1,  # is_edited
-                                    original_id or word_id,  # original_id
-                                    'synced'
-                                ))
-                                server_ids.append(c.lastrowid)
-                            else:
-                                # Update existing word
-                                c.execute('''
-                                    UPDATE words SET
-                                        meaning_bangla = ?,
-                                        meaning_english = ?,
-                                        synonyms = ?,
-                                        example_sentence = ?,
-                                        category = ?,
-                                        is_edited = ?,
-                                        last_synced = ?,
-                                        sync_status = 'synced'
-                                    WHERE id = ?
-                                ''', (
-                                    word.get('meaning_bangla', ''),
-                                    word.get('meaning_english', ''),
-                                    word.get('synonyms', ''),
-                                    word.get('example_sentence', ''),
-                                    word.get('category', 'General Vocabulary'),
-                                    word.get('is_edited', 0),
-                                    current_time,
-                                    word_id
-                                ))
-                                server_ids.append(word_id)
                         else:
-                            # Insert new word (could be edited from another device)
-                            c.execute('''
-                                INSERT INTO words 
-                                (word, meaning_bangla, meaning_english, synonyms, example_sentence, 
-                                 category, date_added, device_id, last_synced, is_edited, 
-                                 original_id, is_deleted, sync_status)
-                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                            ''', (
+                            # Mark word as deleted by content and device_id (counted when flushed)
+                            if word_text in pending_words:
+                                flush_pending()
+                            pending_deletes.append((current_time, word_text, device_id))
+                            pending_words.add(word_text)
+                            known_rows.pop(word_text, None)
+                        continue
+                    
+                    # For edited words - IMPORTANT FIX
+                    if is_edited:
+                        original_id = word.get('original_id')
+                        if original_id:
+                            # Mark original word as deleted and edited
+                            flush_pending()
+                            c.execute(SYNC_RETIRE_ORIGINAL_SQL, (current_time, original_id))
+                            if c.rowcount > 0:
+                                known_rows.clear()
+                    
+                    # For new/edited words - check if exists from this device
+                    if word_text in known_rows:
+                        row = known_rows[word_text]
+                    else:
+                        if word_text in pending_words:
+                            flush_pending()
+                        c.execute(SYNC_EXISTING_SQL, (word_text, device_id))
+                        row = known_rows[word_text] = c.fetchone()
+                    # Whatever happens below changes this word's row
+                    del known_rows[word_text]
+                    existing = row if row and row[1] == 0 else None
+                    
+                    if existing:
+                        word_id, is_existing_edited = existing[0], existing[2]
+                        
+                        # For edited words, create a new entry
+                        if is_edited and not is_existing_edited:
+                            # Insert as new edited word with original_id reference
+                            flush_pending()
+                            c.execute(SYNC_INSERT_SQL, (
                                 word_text,
                                 word.get('meaning_bangla', ''),
                                 word.get('meaning_english', ''),
@@ -1218,33 +1449,66 @@ def sync_words():
                                 word.get('timestamp', current_time),
                                 device_id,
                                 current_time,
-                                word.get('is_edited', 0),
-                                word.get('original_id'),
                                 0,  # is_deleted
-                                'synced'
+                                1,  # is_edited
+                                original_id or word_id,  # original_id
                             ))
                             server_ids.append(c.lastrowid)
-                        
-                        synced_count += 1
-                        
-                    except Exception as e:
-                        print(f"Error syncing word {word_text}: {e}")
-                        continue
-        
-        # Final device update
-        with get_db_cursor() as (c, conn):
-            # Update device info
-            c.execute('''
-                INSERT OR REPLACE INTO devices 
-                (device_id, device_name, last_sync, last_ip)
-                VALUES (?, ?, ?, ?)
-            ''', (device_id, device_name, current_time, request.remote_addr))
+                        else:
+                            # Update existing word
+                            pending_updates.append(((
+                                word.get('meaning_bangla', ''),
+                                word.get('meaning_english', ''),
+                                word.get('synonyms', ''),
+                                word.get('example_sentence', ''),
+                                word.get('category', 'General Vocabulary'),
+                                word.get('is_edited', 0),
+                                current_time,
+                                word_id
+                            ), len(server_ids)))
+                            pending_words.add(word_text)
+                            server_ids.append(word_id)
+                    else:
+                        # Insert new word (could be edited from another device)
+                        params = (
+                            word_text,
+                            word.get('meaning_bangla', ''),
+                            word.get('meaning_english', ''),
+                            word.get('synonyms', ''),
+                            word.get('example_sentence', ''),
+                            word.get('category', 'General Vocabulary'),
+                            word.get('timestamp', current_time),
+                            device_id,
+                            current_time,
+                            0,  # is_deleted
+                            word.get('is_edited', 0),
+                            word.get('original_id'),
+                        )
+                        if row:
+                            # A deleted row still holds (word, device_id), so this insert
+                            # conflicts - run it alone to report the error for this word only
+                            flush_pending()
+                            c.execute(SYNC_INSERT_SQL, params)
+                            server_ids.append(c.lastrowid)
+                        else:
+                            pending_inserts.append((params, len(server_ids)))
+                            pending_words.add(word_text)
+                            server_ids.append(None)
+                    
+                    synced_count += 1
+                    
+                except Exception as e:
+                    logger.error("Error syncing word %s: %s", word_text, e)
+                    continue
             
-            # Log sync
-            c.execute('''
-                INSERT INTO sync_log (device_id, action, details)
-                VALUES (?, ?, ?)
-            ''', (device_id, 'sync', f'Synced {synced_count} items'))
+            flush_pending()
+            
+            # Device info and the sync log commit together with the words
+            c.execute(DEVICE_UPSERT_SQL, (device_id, device_name, current_time, request.remote_addr))
+            c.execute(SYNC_LOG_INSERT_SQL, (device_id, 'sync', f'Synced {synced_count} items'))
+        
+        # Slots of queued words that failed to insert stay empty
+        server_ids = [server_id for server_id in server_ids if server_id is not None]
         
         return jsonify({
             "status": "success",
@@ -1255,51 +1519,55 @@ def sync_words():
         })
         
     except Exception as e:
-        print(f"Sync error: {e}")
+        logger.error("Sync error: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/download', methods=['GET', 'OPTIONS'])
 def download_old_endpoint():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
-        with get_db_connection() as conn:
-            query = '''
-                SELECT 
-                    id as server_id,
-                    word,
-                    meaning_bangla,
-                    meaning_english,
-                    synonyms,
-                    example_sentence,
-                    category,
-                    date_added,
-                    device_id,
-                    is_deleted,
-                    is_edited,
-                    original_id
-                FROM words 
-                WHERE is_deleted = 0
-                ORDER BY date_added DESC
-            '''
-            
-            df = pd.read_sql_query(query, conn)
-            words = df.to_dict('records')
-            
-            return jsonify(words)
+        query = '''
+            SELECT 
+                id as server_id,
+                word,
+                meaning_bangla,
+                meaning_english,
+                synonyms,
+                example_sentence,
+                category,
+                date_added,
+                device_id,
+                is_deleted,
+                is_edited,
+                original_id
+            FROM words 
+            WHERE is_deleted = 0
+            ORDER BY date_added DESC
+        '''
+        
+        def generate():
+            # Same streaming as /api/download_all, but as a bare list
+            with get_db_cursor(readonly=True) as (c, conn):
+                c.execute(query)
+                rows = c.fetchmany(DOWNLOAD_BATCH)
+                yield '['
+                first = True
+                while rows:
+                    chunk = b','.join(orjson.dumps(dict(row)) for row in rows)
+                    yield chunk if first else b',' + chunk
+                    first = False
+                    rows = c.fetchmany(DOWNLOAD_BATCH)
+                yield ']'
+        
+        return Response(start_stream(generate()), mimetype='application/json')
         
     except Exception as e:
-        print(f"Download error: {e}")
+        logger.error("Download error: %s", e)
         return jsonify({"error": str(e), "message": "Failed to download words"}), 500
 
 @app.route('/api/last_sync', methods=['GET', 'OPTIONS'])
 def get_last_sync():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(readonly=True) as (c, conn):
             c.execute("SELECT MAX(last_sync) FROM devices")
             result = c.fetchone()
             
@@ -1310,53 +1578,83 @@ def get_last_sync():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Rows pulled from the cursor per fetchmany() call while exporting
+EXPORT_BATCH = 5000
+
 @app.route('/api/export_excel', methods=['GET', 'OPTIONS'])
 def export_excel():
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
-        with get_db_connection() as conn:
-            query = '''
-                SELECT 
-                    word,
-                    meaning_bangla,
-                    meaning_english,
-                    synonyms,
-                    example_sentence,
-                    category,
-                    date_added,
-                    device_id
-                FROM words 
-                WHERE is_deleted = 0
-                ORDER BY date_added DESC
-            '''
-            
-            df = pd.read_sql_query(query, conn)
-            
-            if df.empty:
-                df = pd.DataFrame(columns=['word', 'meaning_bangla', 'meaning_english', 'category', 'device_id'])
-            
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"vocabulary_export_{timestamp}.xlsx"
-            
-            df.to_excel(EXCEL_FILE, index=False)
-            
-            return send_file(
-                EXCEL_FILE,
-                mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                as_attachment=True,
-                download_name=filename
-            )
+        query = '''
+            SELECT 
+                word,
+                meaning_bangla,
+                meaning_english,
+                synonyms,
+                example_sentence,
+                category,
+                date_added,
+                device_id
+            FROM words 
+            WHERE is_deleted = 0
+            ORDER BY date_added DESC
+        '''
+        
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"vocabulary_export_{timestamp}.xlsx"
+        
+        # Write rows straight from the cursor; constant_memory flushes each row as it goes
+        buf = io.BytesIO()
+        workbook = xlsxwriter.Workbook(buf, {'constant_memory': True})
+        worksheet = workbook.add_worksheet()
+        header_format = workbook.add_format({'bold': True})
+        
+        with get_db_cursor(readonly=True) as (c, conn):
+            c.execute(query)
+            worksheet.write_row(0, 0, [column[0] for column in c.description], header_format)
+            row_num = 1
+            while True:
+                rows = c.fetchmany(EXPORT_BATCH)
+                if not rows:
+                    break
+                for row in rows:
+                    worksheet.write_row(row_num, 0, row)
+                    row_num += 1
+        
+        workbook.close()
+        buf.seek(0)
+        
+        return send_file(
+            buf,
+            mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+            as_attachment=True,
+            download_name=filename
+        )
         
     except Exception as e:
-        print(f"Excel export error: {e}")
+        logger.error("Excel export error: %s", e)
         return jsonify({"error": str(e)}), 500
 
-@app.route('/')
-def home():
-    ip_address = get_ip_address()
-    return f'''
+# Server IP shown on the landing page; re-resolved every IP_TTL seconds
+IP_TTL = 300
+_ip_cache = {"ip": None, "ts": 0.0}
+
+def get_ip_address():
+    """LAN address other devices can reach this server on"""
+    if _ip_cache["ip"] is not None and time.time() - _ip_cache["ts"] < IP_TTL:
+        return _ip_cache["ip"]
+    try:
+        # Connecting a UDP socket sends nothing but picks the outbound interface
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            s.connect(('8.8.8.8', 80))
+            ip = s.getsockname()[0]
+    except OSError:
+        ip = '127.0.0.1'
+    _ip_cache["ip"] = ip
+    _ip_cache["ts"] = time.time()
+    return ip
+
+# Landing page, built once; {IP} is the only placeholder
+_HOME_HTML = '''
     <!DOCTYPE html>
     <html>
     <head>
@@ -1364,27 +1662,27 @@ def home():
         <meta charset="UTF-8">
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <style>
-            body {{
+            body {
                 font-family: Arial, sans-serif;
                 padding: 20px;
                 max-width: 800px;
                 margin: 0 auto;
                 background: linear-gradient(135deg, #f0f4ff 0%, #f8fafc 100%);
-            }}
-            .container {{
+            }
+            .container {
                 background: white;
                 padding: 30px;
                 border-radius: 20px;
                 box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-            }}
-            h1 {{ 
+            }
+            h1 { 
                 color: #6366f1; 
                 margin-bottom: 10px;
                 display: flex;
                 align-items: center;
                 gap: 10px;
-            }}
-            .btn {{
+            }
+            .btn {
                 background: linear-gradient(135deg, #6366f1 0%, #4f46e5 100%);
                 color: white;
                 padding: 12px 24px;
@@ -1398,19 +1696,19 @@ def home():
                 cursor: pointer;
                 font-weight: 600;
                 transition: all 0.3s;
-            }}
-            .btn:hover {{
+            }
+            .btn:hover {
                 transform: translateY(-2px);
                 box-shadow: 0 5px 15px rgba(99, 102, 241, 0.3);
-            }}
-            .info {{
+            }
+            .info {
                 background: #e0f2fe;
                 padding: 20px;
                 border-radius: 12px;
                 margin: 25px 0;
                 border-left: 4px solid #3b82f6;
-            }}
-            .url {{
+            }
+            .url {
                 background: #f3f4f6;
                 padding: 12px;
                 border-radius: 8px;
@@ -1418,8 +1716,8 @@ def home():
                 margin: 8px 0;
                 word-break: break-all;
                 border: 1px solid #e5e7eb;
-            }}
-            .status {{
+            }
+            .status {
                 display: inline-flex;
                 align-items: center;
                 gap: 8px;
@@ -1428,14 +1726,14 @@ def home():
                 color: #065f46;
                 border-radius: 20px;
                 font-weight: 600;
-            }}
-            .feature {{
+            }
+            .feature {
                 background: #f0fdf4;
                 padding: 15px;
                 border-radius: 10px;
                 margin: 15px 0;
                 border-left: 4px solid #10b981;
-            }}
+            }
         </style>
     </head>
     <body>
@@ -1450,12 +1748,12 @@ def home():
             </div>
             
             <div class="info">
-                <p><strong>Server IP:</strong> {ip_address}</p>
+                <p><strong>Server IP:</strong> {IP}</p>
                 <p><strong>Port:</strong> 8000</p>
                 
                 <p><strong style="color: #6366f1;">Access URLs:</strong></p>
                 <div class="url">💻 On this computer: http://localhost:8000/app-full</div>
-                <div class="url">📱 On your phone: http://{ip_address}:8000/app-full</div>
+                <div class="url">📱 On your phone: http://{IP}:8000/app-full</div>
             </div>
             
             <div class="feature">
@@ -1490,30 +1788,30 @@ def home():
         </div>
         
         <script>
-            async function testConnection() {{
+            async function testConnection() {
                 const result = document.getElementById('debugResult');
                 result.innerHTML = '<div style="color: #f59e0b;">Testing connection...</div>';
                 
-                try {{
+                try {
                     const response = await fetch('/api/test');
-                    if (response.ok) {{
+                    if (response.ok) {
                         const data = await response.json();
                         result.innerHTML = `
                             <div style="color: #10b981;">
                                 <p>✅ Connection successful!</p>
-                                <p><strong>Server:</strong> ${{data.server_ip}}</p>
-                                <p><strong>Time:</strong> ${{data.timestamp}}</p>
-                                <p><strong>Version:</strong> ${{data.version}}</p>
-                                <p><strong>Database:</strong> ${{data.database}}</p>
+                                <p><strong>Server:</strong> ${data.server_ip}</p>
+                                <p><strong>Time:</strong> ${data.timestamp}</p>
+                                <p><strong>Version:</strong> ${data.version}</p>
+                                <p><strong>Database:</strong> ${data.database}</p>
                             </div>
                         `;
-                    }} else {{
+                    } else {
                         result.innerHTML = '<div style="color: #ef4444;">❌ Connection failed</div>';
-                    }}
-                }} catch (error) {{
+                    }
+                } catch (error) {
                     result.innerHTML = '<div style="color: #ef4444;">❌ Connection error: ' + error.message + '</div>';
-                }}
-            }}
+                }
+            }
             
             // Auto-test on load
             setTimeout(testConnection, 1000);
@@ -1522,13 +1820,12 @@ def home():
     </html>
     '''
 
-@app.route('/app-full')
-def serve_app():
-    try:
-        with open('vocabulary_app.html', 'r', encoding='utf-8') as f:
-            return f.read()
-    except FileNotFoundError:
-        return '''
+@app.route('/')
+def home():
+    return _HOME_HTML.replace('{IP}', get_ip_address())
+
+# Shown by /app-full when vocabulary_app.html is missing
+APP_NOT_FOUND_HTML = '''
         <!DOCTYPE html>
         <html>
         <body style="padding: 50px; font-family: Arial; text-align: center;">
@@ -1537,7 +1834,15 @@ def serve_app():
             <a href="/" style="color: #6366f1; text-decoration: none; font-weight: bold;">← Go Back</a>
         </body>
         </html>
-        ''', 404
+        '''
+
+@app.route('/app-full')
+def serve_app():
+    try:
+        # send_file hands the file to the WSGI server and answers conditional GETs
+        return send_file('vocabulary_app.html', mimetype='text/html', conditional=True)
+    except FileNotFoundError:
+        return APP_NOT_FOUND_HTML, 404
     
 
 
@@ -1550,40 +1855,74 @@ def serve_app():
 # ==============================================
 
 
+def parse_payload(data, fields):
+    """Read (name, coerce, default) fields from a request payload, in order"""
+    return [data.get(name, default) if coerce is None else coerce(data.get(name, default))
+            for name, coerce, default in fields]
+
+# List and object fields are stored as JSON text, encoded by the app's orjson provider
+QUIZ_RESULT_FIELDS = (
+    ('device_id', None, 'unknown'),
+    ('quiz_type', None, 'multiple_choice'),
+    ('score', int, 0),
+    ('total_questions', int, 10),
+    ('accuracy', float, 0.0),
+    ('time_taken_seconds', int, 0),
+    ('correct_words', app.json.dumps, []),
+    ('incorrect_words', app.json.dumps, []),
+    ('details', app.json.dumps, {}),
+)
+
+QUIZ_SETTINGS_FIELDS = (
+    ('device_id', None, 'unknown'),
+    ('quiz_type', None, 'multiple_choice'),
+    ('question_count', int, 10),
+    ('difficulty', None, 'mixed'),
+    ('categories', app.json.dumps, ['all']),
+)
+
+# Statements used by the quiz endpoints, kept as constants like the sync ones
+QUIZ_RESULT_INSERT_SQL = '''
+    INSERT INTO quiz_results 
+    (device_id, quiz_type, score, total_questions, accuracy, 
+     time_taken_seconds, correct_words, incorrect_words, details, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+QUIZ_STATS_UPSERT_SQL = '''
+    INSERT INTO quiz_statistics 
+    (device_id, total_quizzes, total_correct, total_questions, 
+     total_time_seconds, best_score, best_accuracy, last_quiz_date)
+    VALUES (?, 1, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(device_id) DO UPDATE SET
+        total_quizzes = total_quizzes + 1,
+        total_correct = total_correct + excluded.total_correct,
+        total_questions = total_questions + excluded.total_questions,
+        total_time_seconds = total_time_seconds + excluded.total_time_seconds,
+        best_score = max(best_score, excluded.best_score),
+        best_accuracy = max(best_accuracy, excluded.best_accuracy),
+        last_quiz_date = excluded.last_quiz_date
+'''
+
 @app.route('/api/save_quiz_result', methods=['POST', 'OPTIONS'])
 def save_quiz_result():
     """Save quiz result to database"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         data = request.json
         if not data:
             return jsonify({"status": "error", "message": "No data"}), 400
         
-        device_id = data.get('device_id', 'unknown')
-        quiz_type = data.get('quiz_type', 'multiple_choice')
-        score = int(data.get('score', 0))
-        total_questions = int(data.get('total_questions', 10))
-        accuracy = float(data.get('accuracy', 0.0))
-        time_taken_seconds = int(data.get('time_taken_seconds', 0))
-        correct_words = json.dumps(data.get('correct_words', []))
-        incorrect_words = json.dumps(data.get('incorrect_words', []))
-        details = json.dumps(data.get('details', {}))
-        timestamp = datetime.now().isoformat()
+        (device_id, quiz_type, score, total_questions, accuracy, time_taken_seconds,
+         correct_words, incorrect_words, details) = parse_payload(data, QUIZ_RESULT_FIELDS)
+        timestamp = iso_now()
         
         # Calculate accuracy if not provided
         if accuracy == 0 and total_questions > 0:
             accuracy = (score / total_questions) * 100
         
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(write=True) as (c, conn):
             # Save quiz result
-            c.execute('''
-                INSERT INTO quiz_results 
-                (device_id, quiz_type, score, total_questions, accuracy, 
-                 time_taken_seconds, correct_words, incorrect_words, details, timestamp)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
+            c.execute(QUIZ_RESULT_INSERT_SQL, (
                 device_id,
                 quiz_type,
                 score,
@@ -1598,42 +1937,16 @@ def save_quiz_result():
             
             result_id = c.lastrowid
             
-            # Update quiz statistics - SIMPLIFIED VERSION
-            # First, try to update existing record
-            c.execute('''
-                UPDATE quiz_statistics 
-                SET total_quizzes = total_quizzes + 1,
-                    total_correct = total_correct + ?,
-                    total_questions = total_questions + ?,
-                    total_time_seconds = total_time_seconds + ?,
-                    best_score = CASE WHEN ? > best_score THEN ? ELSE best_score END,
-                    best_accuracy = CASE WHEN ? > best_accuracy THEN ? ELSE best_accuracy END,
-                    last_quiz_date = ?
-                WHERE device_id = ?
-            ''', (
+            # Create or update this device's running totals in one statement
+            c.execute(QUIZ_STATS_UPSERT_SQL, (
+                device_id,
                 score, total_questions, time_taken_seconds,
-                score, score, accuracy, accuracy, timestamp, device_id
+                score, accuracy, timestamp
             ))
-            
-            # If no rows were updated, insert a new record
-            if c.rowcount == 0:
-                c.execute('''
-                    INSERT INTO quiz_statistics 
-                    (device_id, total_quizzes, total_correct, total_questions, 
-                     total_time_seconds, best_score, best_accuracy, last_quiz_date)
-                    VALUES (?, 1, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    device_id,
-                    score, total_questions, time_taken_seconds,
-                    score, accuracy, timestamp
-                ))
-            
-            # Log the action
-            c.execute('''
-                INSERT INTO sync_log (device_id, action, details)
-                VALUES (?, ?, ?)
-            ''', (device_id, 'quiz_completed', 
-                  f'Quiz completed: {score}/{total_questions} ({accuracy:.1f}%) in {time_taken_seconds}s'))
+        
+        # Log the action
+        queue_sync_log(device_id, 'quiz_completed', 
+                       f'Quiz completed: {score}/{total_questions} ({accuracy:.1f}%) in {time_taken_seconds}s')
         
         return jsonify({
             "status": "success",
@@ -1643,7 +1956,7 @@ def save_quiz_result():
         })
         
     except Exception as e:
-        print(f"❌ Error saving quiz result: {e}")
+        logger.error("❌ Error saving quiz result: %s", e)
         import traceback
         traceback.print_exc()
         return jsonify({"status": "error", "message": str(e)}), 500
@@ -1658,72 +1971,55 @@ def save_quiz_result():
 
 
 
+# Word lists are stored as JSON text and embedded in the response as-is, so
+# anything json_valid() rejects (including NULL) is served as an empty list
+QUIZ_RESULTS_DEVICE_SQL = '''
+    SELECT id, quiz_type, score, total_questions, accuracy, 
+           time_taken_seconds, timestamp,
+           CASE WHEN json_valid(correct_words) THEN correct_words ELSE '[]' END as correct_words,
+           CASE WHEN json_valid(incorrect_words) THEN incorrect_words ELSE '[]' END as incorrect_words
+    FROM quiz_results 
+    WHERE device_id = ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+
+QUIZ_RESULTS_ALL_SQL = '''
+    SELECT qr.id, qr.quiz_type, qr.score, qr.total_questions, qr.accuracy, 
+           qr.time_taken_seconds, qr.timestamp, 
+           CASE WHEN json_valid(qr.correct_words) THEN qr.correct_words ELSE '[]' END as correct_words,
+           CASE WHEN json_valid(qr.incorrect_words) THEN qr.incorrect_words ELSE '[]' END as incorrect_words,
+           qr.device_id,
+           COALESCE(NULLIF(d.device_name, ''), 'Device-' || substr(qr.device_id, 1, 8)) as device_name
+    FROM quiz_results qr
+    LEFT JOIN devices d ON qr.device_id = d.device_id
+    ORDER BY qr.timestamp DESC
+    LIMIT ?
+'''
+
 @app.route('/api/quiz_results', methods=['GET', 'OPTIONS'])
 def get_quiz_results():
     """Get quiz results for a device or all devices"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         device_id = request.args.get('device_id', '')
         show_all = request.args.get('show_all', 'false').lower() == 'true'
         limit = int(request.args.get('limit', 20))
         
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(readonly=True) as (c, conn):
             if device_id and not show_all:
                 # Get results for specific device
-                c.execute('''
-                    SELECT id, quiz_type, score, total_questions, accuracy, 
-                           time_taken_seconds, timestamp, correct_words, incorrect_words
-                    FROM quiz_results 
-                    WHERE device_id = ?
-                    ORDER BY timestamp DESC
-                    LIMIT ?
-                ''', (device_id, limit))
+                c.execute(QUIZ_RESULTS_DEVICE_SQL, (device_id, limit))
             else:
                 # Get results from ALL devices
-                c.execute('''
-                    SELECT qr.id, qr.quiz_type, qr.score, qr.total_questions, qr.accuracy, 
-                           qr.time_taken_seconds, qr.timestamp, 
-                           qr.correct_words, qr.incorrect_words,
-                           qr.device_id, d.device_name
-                    FROM quiz_results qr
-                    LEFT JOIN devices d ON qr.device_id = d.device_id
-                    ORDER BY qr.timestamp DESC
-                    LIMIT ?
-                ''', (limit,))
+                c.execute(QUIZ_RESULTS_ALL_SQL, (limit,))
             
-            results = []
-            for row in c.fetchall():
-                if device_id and not show_all:
-                    # Single device format
-                    result = {
-                        "id": row[0],
-                        "quiz_type": row[1],
-                        "score": row[2],
-                        "total_questions": row[3],
-                        "accuracy": float(row[4]),
-                        "time_taken_seconds": row[5],
-                        "timestamp": row[6],
-                        "correct_words": json.loads(row[7]) if row[7] else [],
-                        "incorrect_words": json.loads(row[8]) if row[8] else []
-                    }
-                else:
-                    # All devices format (includes device info)
-                    result = {
-                        "id": row[0],
-                        "quiz_type": row[1],
-                        "score": row[2],
-                        "total_questions": row[3],
-                        "accuracy": float(row[4]),
-                        "time_taken_seconds": row[5],
-                        "timestamp": row[6],
-                        "correct_words": json.loads(row[7]) if row[7] else [],
-                        "incorrect_words": json.loads(row[8]) if row[8] else [],
-                        "device_id": row[9],
-                        "device_name": row[10] or f"Device-{row[9][:8]}"
-                    }
-                results.append(result)
+            # Rows already carry the response's columns in order; only the word
+            # lists, checked by json_valid() in the SELECT, are swapped for
+            # orjson.Fragment so they are embedded instead of parsed and re-encoded
+            results = [{**row,
+                        "correct_words": orjson.Fragment(row["correct_words"]),
+                        "incorrect_words": orjson.Fragment(row["incorrect_words"])}
+                       for row in c.fetchall()]
             
             return jsonify({
                 "status": "success",
@@ -1732,28 +2028,60 @@ def get_quiz_results():
             })
         
     except Exception as e:
-        print(f"❌ Error getting quiz results: {e}")
+        logger.error("❌ Error getting quiz results: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# The totals and today's count come back in one statement; today's count is
+# read from quiz_daily_counters
+QUIZ_STATS_DEVICE_SQL = '''
+    SELECT total_quizzes, total_correct, total_questions, 
+           total_time_seconds, best_score, best_accuracy, last_quiz_date,
+           (SELECT count 
+            FROM quiz_daily_counters 
+            WHERE device_id = :device_id AND quiz_date = :today) as quizzes_today
+    FROM quiz_statistics 
+    WHERE device_id = :device_id
+'''
+
+QUIZ_STATS_GLOBAL_SQL = '''
+    SELECT 
+        COUNT(DISTINCT device_id) as total_devices,
+        SUM(total_quizzes) as total_quizzes,
+        SUM(total_correct) as total_correct,
+        SUM(total_questions) as total_questions,
+        SUM(total_time_seconds) as total_time_seconds,
+        MAX(best_score) as global_best_score,
+        MAX(best_accuracy) as global_best_accuracy,
+        (SELECT COUNT(*) 
+         FROM quiz_daily_counters 
+         WHERE quiz_date = :today) as devices_active_today,
+        (SELECT SUM(count) 
+         FROM quiz_daily_counters 
+         WHERE quiz_date = :today) as quizzes_today
+    FROM quiz_statistics
+'''
+
+QUIZ_RECENT_SQL = '''
+    SELECT qr.score, qr.total_questions, qr.accuracy, qr.timestamp,
+           qr.device_id, d.device_name
+    FROM quiz_results qr
+    LEFT JOIN devices d ON qr.device_id = d.device_id
+    ORDER BY qr.timestamp DESC
+    LIMIT 5
+'''
+
 @app.route('/api/quiz_statistics', methods=['GET', 'OPTIONS'])
 def get_quiz_statistics():
     """Get quiz statistics for a device or overall"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         device_id = request.args.get('device_id', '')
         global_stats = request.args.get('global', 'false').lower() == 'true'
         
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(readonly=True) as (c, conn):
+            today = date.today().isoformat()
             if device_id and not global_stats:
                 # Get statistics for specific device
-                c.execute('''
-                    SELECT total_quizzes, total_correct, total_questions, 
-                           total_time_seconds, best_score, best_accuracy, last_quiz_date
-                    FROM quiz_statistics 
-                    WHERE device_id = ?
-                ''', (device_id,))
+                c.execute(QUIZ_STATS_DEVICE_SQL, {"device_id": device_id, "today": today})
                 
                 stats_row = c.fetchone()
                 
@@ -1777,13 +2105,13 @@ def get_quiz_statistics():
                     })
                 
                 # Calculate derived statistics for single device
-                total_quizzes = stats_row[0] or 0
-                total_correct = stats_row[1] or 0
-                total_questions = stats_row[2] or 0
-                total_time_seconds = stats_row[3] or 0
-                best_score = stats_row[4] or 0
-                best_accuracy = float(stats_row[5] or 0)
-                last_quiz_date = stats_row[6]
+                total_quizzes = stats_row["total_quizzes"] or 0
+                total_correct = stats_row["total_correct"] or 0
+                total_questions = stats_row["total_questions"] or 0
+                total_time_seconds = stats_row["total_time_seconds"] or 0
+                best_score = stats_row["best_score"] or 0
+                best_accuracy = float(stats_row["best_accuracy"] or 0)
+                last_quiz_date = stats_row["last_quiz_date"]
                 
                 overall_accuracy = 0
                 if total_questions > 0:
@@ -1793,15 +2121,7 @@ def get_quiz_statistics():
                 if total_questions > 0:
                     average_time_per_question = total_time_seconds / total_questions
                 
-                # Get quizzes today for this device
-                today = datetime.now().strftime('%Y-%m-%d')
-                c.execute('''
-                    SELECT COUNT(*) 
-                    FROM quiz_results 
-                    WHERE device_id = ? AND DATE(timestamp) = ?
-                ''', (device_id, today))
-                
-                quizzes_today = c.fetchone()[0] or 0
+                quizzes_today = stats_row["quizzes_today"] or 0
                 
                 statistics = {
                     "device_id": device_id,
@@ -1820,59 +2140,32 @@ def get_quiz_statistics():
                 
             else:
                 # Get GLOBAL statistics across all devices
-                c.execute('''
-                    SELECT 
-                        COUNT(DISTINCT device_id) as total_devices,
-                        SUM(total_quizzes) as total_quizzes,
-                        SUM(total_correct) as total_correct,
-                        SUM(total_questions) as total_questions,
-                        SUM(total_time_seconds) as total_time_seconds,
-                        MAX(best_score) as global_best_score,
-                        MAX(best_accuracy) as global_best_accuracy
-                    FROM quiz_statistics
-                ''')
+                c.execute(QUIZ_STATS_GLOBAL_SQL, {"today": today})
                 
                 global_row = c.fetchone()
                 
-                total_devices = global_row[0] or 0
-                total_quizzes = global_row[1] or 0
-                total_correct = global_row[2] or 0
-                total_questions = global_row[3] or 0
-                total_time_seconds = global_row[4] or 0
-                global_best_score = global_row[5] or 0
-                global_best_accuracy = float(global_row[6] or 0)
-                
-                # Get today's quizzes across all devices
-                today = datetime.now().strftime('%Y-%m-%d')
-                c.execute('''
-                    SELECT COUNT(DISTINCT device_id), COUNT(*) 
-                    FROM quiz_results 
-                    WHERE DATE(timestamp) = ?
-                ''', (today,))
-                
-                today_row = c.fetchone()
-                devices_active_today = today_row[0] or 0
-                quizzes_today = today_row[1] or 0
+                total_devices = global_row["total_devices"] or 0
+                total_quizzes = global_row["total_quizzes"] or 0
+                total_correct = global_row["total_correct"] or 0
+                total_questions = global_row["total_questions"] or 0
+                total_time_seconds = global_row["total_time_seconds"] or 0
+                global_best_score = global_row["global_best_score"] or 0
+                global_best_accuracy = float(global_row["global_best_accuracy"] or 0)
+                devices_active_today = global_row["devices_active_today"] or 0
+                quizzes_today = global_row["quizzes_today"] or 0
                 
                 # Get recent quizzes
-                c.execute('''
-                    SELECT qr.score, qr.total_questions, qr.accuracy, qr.timestamp,
-                           qr.device_id, d.device_name
-                    FROM quiz_results qr
-                    LEFT JOIN devices d ON qr.device_id = d.device_id
-                    ORDER BY qr.timestamp DESC
-                    LIMIT 5
-                ''')
+                c.execute(QUIZ_RECENT_SQL)
                 
                 recent_quizzes = []
                 for row in c.fetchall():
                     recent_quizzes.append({
-                        "score": row[0],
-                        "total_questions": row[1],
-                        "accuracy": float(row[2]),
-                        "timestamp": row[3],
-                        "device_id": row[4],
-                        "device_name": row[5] or f"Device-{row[4][:8]}"
+                        "score": row["score"],
+                        "total_questions": row["total_questions"],
+                        "accuracy": float(row["accuracy"]),
+                        "timestamp": row["timestamp"],
+                        "device_id": row["device_id"],
+                        "device_name": row["device_name"] or f"Device-{row['device_id'][:8]}"
                     })
                 
                 overall_accuracy = 0
@@ -1905,7 +2198,7 @@ def get_quiz_statistics():
             })
         
     except Exception as e:
-        print(f"❌ Error getting quiz statistics: {e}")
+        logger.error("❌ Error getting quiz statistics: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
@@ -1921,36 +2214,28 @@ def get_quiz_statistics():
 
 
 
+QUIZ_SETTINGS_UPSERT_SQL = '''
+    INSERT OR REPLACE INTO quiz_settings 
+    (device_id, quiz_type, question_count, difficulty, categories)
+    VALUES (?, ?, ?, ?, ?)
+'''
+
 @app.route('/api/save_quiz_settings', methods=['POST', 'OPTIONS'])
 def save_quiz_settings():
     """Save quiz settings for a device"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         data = request.json
         if not data:
             return jsonify({"status": "error", "message": "No data"}), 400
         
-        device_id = data.get('device_id', 'unknown')
-        quiz_type = data.get('quiz_type', 'multiple_choice')
-        question_count = int(data.get('question_count', 10))
-        difficulty = data.get('difficulty', 'mixed')
-        categories = json.dumps(data.get('categories', ['all']))
+        device_id, quiz_type, question_count, difficulty, categories = parse_payload(data, QUIZ_SETTINGS_FIELDS)
         
-        with get_db_cursor() as (c, conn):
-            c.execute('''
-                INSERT OR REPLACE INTO quiz_settings 
-                (device_id, quiz_type, question_count, difficulty, categories)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (device_id, quiz_type, question_count, difficulty, categories))
-            
-            # Log the action
-            c.execute('''
-                INSERT INTO sync_log (device_id, action, details)
-                VALUES (?, ?, ?)
-            ''', (device_id, 'quiz_settings_updated', 
-                  f'Quiz settings updated: {quiz_type}, {question_count} questions'))
+        with get_db_cursor(write=True) as (c, conn):
+            c.execute(QUIZ_SETTINGS_UPSERT_SQL, (device_id, quiz_type, question_count, difficulty, categories))
+        
+        # Log the action
+        queue_sync_log(device_id, 'quiz_settings_updated', 
+                       f'Quiz settings updated: {quiz_type}, {question_count} questions')
         
         return jsonify({
             "status": "success",
@@ -1958,27 +2243,26 @@ def save_quiz_settings():
         })
         
     except Exception as e:
-        print(f"❌ Error saving quiz settings: {e}")
+        logger.error("❌ Error saving quiz settings: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+QUIZ_SETTINGS_SELECT_SQL = '''
+    SELECT quiz_type, question_count, difficulty, categories
+    FROM quiz_settings 
+    WHERE device_id = ?
+'''
+
 @app.route('/api/get_quiz_settings', methods=['GET', 'OPTIONS'])
 def get_quiz_settings():
     """Get quiz settings for a device"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         device_id = request.args.get('device_id', '')
         
         if not device_id:
             return jsonify({"status": "error", "message": "device_id required"}), 400
         
-        with get_db_cursor() as (c, conn):
-            c.execute('''
-                SELECT quiz_type, question_count, difficulty, categories
-                FROM quiz_settings 
-                WHERE device_id = ?
-            ''', (device_id,))
+        with get_db_cursor(readonly=True) as (c, conn):
+            c.execute(QUIZ_SETTINGS_SELECT_SQL, (device_id,))
             
             settings_row = c.fetchone()
             
@@ -1996,14 +2280,14 @@ def get_quiz_settings():
             
             # Parse categories from JSON string
             try:
-                categories = json.loads(settings_row[3])
+                categories = json.loads(settings_row["categories"])
             except:
                 categories = ["all"]
             
             settings = {
-                "quiz_type": settings_row[0],
-                "question_count": settings_row[1],
-                "difficulty": settings_row[2],
+                "quiz_type": settings_row["quiz_type"],
+                "question_count": settings_row["question_count"],
+                "difficulty": settings_row["difficulty"],
                 "categories": categories
             }
             
@@ -2013,62 +2297,75 @@ def get_quiz_settings():
             })
         
     except Exception as e:
-        print(f"❌ Error getting quiz settings: {e}")
+        logger.error("❌ Error getting quiz settings: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# A device's best score and best accuracy are taken from the same quiz, its
+# top-ranked one, rather than from two independent MAX()es
+QUIZ_LEADERBOARD_SQL = '''
+    WITH ranked AS (
+        SELECT device_id, score, accuracy,
+               ROW_NUMBER() OVER best_first as rn,
+               COUNT(*) OVER whole_device as total_quizzes,
+               MAX(timestamp) OVER whole_device as last_quiz
+        FROM quiz_results
+        WINDOW best_first AS (PARTITION BY device_id ORDER BY score DESC, accuracy DESC),
+               whole_device AS (best_first ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+    )
+    SELECT 
+        r.device_id,
+        COALESCE(NULLIF(d.device_name, ''), 'Device-' || substr(r.device_id, 1, 8)) as device_name,
+        COALESCE(r.score, 0) as best_score,
+        CAST(COALESCE(r.accuracy, 0) AS REAL) as best_accuracy,
+        r.total_quizzes,
+        r.last_quiz
+    FROM ranked r
+    LEFT JOIN devices d ON r.device_id = d.device_id
+    WHERE r.rn = 1
+    ORDER BY best_score DESC, best_accuracy DESC
+    LIMIT ?
+'''
+
 @app.route('/api/quiz_leaderboard', methods=['GET', 'OPTIONS'])
 def get_quiz_leaderboard():
     """Get quiz leaderboard"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         limit = int(request.args.get('limit', 10))
         
-        with get_db_cursor() as (c, conn):
+        with get_db_cursor(readonly=True) as (c, conn):
             # Get best scores per device
-            c.execute('''
-                SELECT 
-                    qr.device_id,
-                    d.device_name,
-                    MAX(qr.score) as best_score,
-                    MAX(qr.accuracy) as best_accuracy,
-                    COUNT(qr.id) as total_quizzes,
-                    MAX(qr.timestamp) as last_quiz
-                FROM quiz_results qr
-                LEFT JOIN devices d ON qr.device_id = d.device_id
-                GROUP BY qr.device_id
-                ORDER BY best_score DESC, best_accuracy DESC
-                LIMIT ?
-            ''', (limit,))
+            c.execute(QUIZ_LEADERBOARD_SQL, (limit,))
             
-            leaderboard = []
-            for row in c.fetchall():
-                leaderboard.append({
-                    "device_id": row[0],
-                    "device_name": row[1] or f"Device-{row[0][:8]}",
-                    "best_score": row[2] or 0,
-                    "best_accuracy": float(row[3] or 0),
-                    "total_quizzes": row[4] or 0,
-                    "last_quiz": row[5]
-                })
+            leaderboard = [dict(row) for row in c.fetchall()]
             
             return jsonify({
                 "status": "success",
                 "leaderboard": leaderboard,
-                "updated": datetime.now().isoformat()
+                "updated": datetime.now()
             })
         
     except Exception as e:
-        print(f"❌ Error getting leaderboard: {e}")
+        logger.error("❌ Error getting leaderboard: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
+# Long histories are cleared a batch at a time, each in its own short write
+# transaction, so other writers get the lock between batches
+QUIZ_CLEAR_BATCH = 1000
+
+QUIZ_RESULTS_CLEAR_SQL = '''
+    DELETE FROM quiz_results WHERE rowid IN
+    (SELECT rowid FROM quiz_results WHERE device_id = ? LIMIT ?)
+'''
+
+QUIZ_STATS_CLEAR_SQL = 'DELETE FROM quiz_statistics WHERE device_id = ?'
+
+QUIZ_COUNTERS_CLEAR_SQL = 'DELETE FROM quiz_daily_counters WHERE device_id = ?'
+
+QUIZ_SETTINGS_CLEAR_SQL = 'DELETE FROM quiz_settings WHERE device_id = ?'
+
 @app.route('/api/clear_quiz_data', methods=['POST', 'OPTIONS'])
 def clear_quiz_data():
     """Clear quiz data for a device"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
         data = request.json
         device_id = data.get('device_id', '')
@@ -2076,25 +2373,29 @@ def clear_quiz_data():
         if not device_id:
             return jsonify({"status": "error", "message": "device_id required"}), 400
         
-        with get_db_cursor() as (c, conn):
-            # Delete quiz results
-            c.execute('DELETE FROM quiz_results WHERE device_id = ?', (device_id,))
-            results_deleted = c.rowcount
-            
+        # Delete quiz results
+        results_deleted = 0
+        while True:
+            with get_db_cursor(write=True) as (c, conn):
+                c.execute(QUIZ_RESULTS_CLEAR_SQL, (device_id, QUIZ_CLEAR_BATCH))
+                batch_deleted = c.rowcount
+            results_deleted += batch_deleted
+            if batch_deleted < QUIZ_CLEAR_BATCH:
+                break
+        
+        with get_db_cursor(write=True) as (c, conn):
             # Delete quiz statistics
-            c.execute('DELETE FROM quiz_statistics WHERE device_id = ?', (device_id,))
+            c.execute(QUIZ_STATS_CLEAR_SQL, (device_id,))
             stats_deleted = c.rowcount
+            c.execute(QUIZ_COUNTERS_CLEAR_SQL, (device_id,))
             
             # Delete quiz settings
-            c.execute('DELETE FROM quiz_settings WHERE device_id = ?', (device_id,))
+            c.execute(QUIZ_SETTINGS_CLEAR_SQL, (device_id,))
             settings_deleted = c.rowcount
-            
-            # Log the action
-            c.execute('''
-                INSERT INTO sync_log (device_id, action, details)
-                VALUES (?, ?, ?)
-            ''', (device_id, 'quiz_data_cleared', 
-                  f'Cleared {results_deleted} results, {stats_deleted} stats, {settings_deleted} settings'))
+        
+        # Log the action
+        queue_sync_log(device_id, 'quiz_data_cleared', 
+                       f'Cleared {results_deleted} results, {stats_deleted} stats, {settings_deleted} settings')
         
         return jsonify({
             "status": "success",
@@ -2107,7 +2408,7 @@ def clear_quiz_data():
         })
         
     except Exception as e:
-        print(f"❌ Error clearing quiz data: {e}")
+        logger.error("❌ Error clearing quiz data: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
@@ -2117,33 +2418,28 @@ def clear_quiz_data():
 
 
 
+# Both counts are aggregated once per table and joined in, instead of being
+# recounted for every device row
+DEVICES_LIST_SQL = '''
+    SELECT d.device_id, d.device_name, d.last_sync, d.last_ip, d.created_at,
+           COALESCE(w.word_count, 0) as word_count,
+           COALESCE(q.quiz_count, 0) as quiz_count
+    FROM devices d
+    LEFT JOIN (SELECT device_id, COUNT(*) as word_count FROM words
+               WHERE is_deleted = 0 GROUP BY device_id) w ON w.device_id = d.device_id
+    LEFT JOIN (SELECT device_id, COUNT(*) as quiz_count FROM quiz_results
+               GROUP BY device_id) q ON q.device_id = d.device_id
+    ORDER BY d.last_sync DESC
+'''
+
 @app.route('/api/devices', methods=['GET', 'OPTIONS'])
 def get_devices():
     """Get list of all devices"""
-    if request.method == 'OPTIONS':
-        return '', 200
-    
     try:
-        with get_db_cursor() as (c, conn):
-            c.execute('''
-                SELECT device_id, device_name, last_sync, last_ip, created_at,
-                       (SELECT COUNT(*) FROM words WHERE device_id = devices.device_id AND is_deleted = 0) as word_count,
-                       (SELECT COUNT(*) FROM quiz_results WHERE device_id = devices.device_id) as quiz_count
-                FROM devices
-                ORDER BY last_sync DESC
-            ''')
+        with get_db_cursor(readonly=True) as (c, conn):
+            c.execute(DEVICES_LIST_SQL)
             
-            devices = []
-            for row in c.fetchall():
-                devices.append({
-                    "device_id": row[0],
-                    "device_name": row[1],
-                    "last_sync": row[2],
-                    "last_ip": row[3],
-                    "created_at": row[4],
-                    "word_count": row[5] or 0,
-                    "quiz_count": row[6] or 0
-                })
+            devices = [dict(row) for row in c.fetchall()]
             
             return jsonify({
                 "status": "success",
@@ -2152,7 +2448,7 @@ def get_devices():
             })
         
     except Exception as e:
-        print(f"❌ Error getting devices: {e}")
+        logger.error("❌ Error getting devices: %s", e)
         return jsonify({"status": "error", "message": str(e)}), 500
 
 
@@ -2176,8 +2472,7 @@ if __name__ == '__main__':
     app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{DB_FILE}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
-    app.run(
-        host='0.0.0.0',
-        port=8000,
-        debug=True
-    )
\ No newline at end of file
+    # Waitress serves requests on a pool of threads with the debugger off; each
+    # thread keeps its own SQLite connections, so WAL lets their reads overlap
+    from waitress import serve
+    serve(app, host='0.0.0.0', port=8000, threads=8, connection_limit=1000)
\ No newline at end of file
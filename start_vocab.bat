@@ -18,7 +18,7 @@ if errorlevel 1 (
 
 REM Install required packages
 echo Installing/updating packages...
-pip install flask flask-cors pandas openpyxl --quiet
+pip install flask flask-cors pandas openpyxl waitress --quiet
 
 REM Start the server
 echo.
@@ -0,0 +1,34 @@
+"""Load both Flask apps against one scratch database, as they share vocabulary.db in production"""
+import atexit
+import importlib.util
+import os
+import shutil
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_servers = None
+
+def _load(name, path):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, path))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def load_servers():
+    """Return (server, api_server), both initialised on the same scratch database.
+
+    Both apps open 'vocabulary.db' relative to the working directory, so the
+    process stays in one scratch directory for the whole test run.
+    """
+    global _servers
+    if _servers is None:
+        workdir = tempfile.mkdtemp(prefix='vocab_tests_')
+        atexit.register(shutil.rmtree, workdir, True)
+        os.chdir(workdir)
+        server = _load('vocab_server', 'server.py')
+        api_server = _load('vocab_api_server', 'api/server.py')
+        server.init_db()
+        api_server.init_db()
+        _servers = server, api_server
+    return _servers
@@ -0,0 +1,48 @@
+import unittest
+
+from tests.support import load_servers
+
+
+def new_word(word, category='General Vocabulary'):
+    return {
+        'word': word, 'meaning_bangla': 'b', 'meaning_english': 'e', 'synonyms': 's',
+        'example_sentence': 'x', 'category': category, 'device_id': 'analytics-test'
+    }
+
+
+class AnalyticsCacheTest(unittest.TestCase):
+    """api/server.py caches /api/analytics; writes must drop the cached copy"""
+
+    def setUp(self):
+        _, api_server = load_servers()
+        self.api = api_server.app.test_client()
+
+    def analytics(self):
+        response = self.api.get('/api/analytics')
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_added_word_shows_up_immediately(self):
+        before = self.analytics()['total_words']
+        response = self.api.post('/api/words/add', json=new_word('cache probe'))
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.analytics()['total_words'], before + 1)
+
+    def test_category_rename_shows_up_immediately(self):
+        self.api.post('/api/categories/add', json={'name': 'Cache Before'})
+        self.api.post('/api/words/add', json=new_word('rename probe', 'Cache Before'))
+        names = {c['name'] for c in self.analytics()['category_breakdown']}
+        self.assertIn('Cache Before', names)
+
+        response = self.api.post('/api/categories/edit',
+                                 json={'old_name': 'Cache Before', 'new_name': 'Cache After'})
+        self.assertEqual(response.status_code, 200)
+
+        names = {c['name'] for c in self.analytics()['category_breakdown']}
+        self.assertIn('Cache After', names)
+        self.assertNotIn('Cache Before', names)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import sqlite3
+import unittest
+from contextlib import contextmanager
+from unittest import mock
+
+from tests.support import load_servers
+
+
+class CategoriesCacheTest(unittest.TestCase):
+    """server.py caches /api/categories; a write must never be hidden by it"""
+
+    def setUp(self):
+        self.server, _ = load_servers()
+        self.root = self.server.app.test_client()
+        self.server.invalidate_categories_cache()
+
+    def names(self):
+        response = self.root.get('/api/categories')
+        self.assertEqual(response.status_code, 200)
+        return {c['name'] for c in response.get_json()}
+
+    def test_added_category_shows_up_immediately(self):
+        self.names()
+        response = self.root.post('/api/categories/add', json={'name': 'Cache Added'})
+        self.assertEqual(response.status_code, 200)
+
+        self.assertIn('Cache Added', self.names())
+
+    def test_reader_racing_a_writer_does_not_cache_the_old_list(self):
+        server = self.server
+        original = server.get_db_cursor
+
+        @contextmanager
+        def racing_cursor(*args, **kwargs):
+            with original(*args, **kwargs) as cursor:
+                yield cursor
+            # A writer commits and invalidates between this reader's query
+            # and the moment it stores the result
+            with sqlite3.connect('vocabulary.db') as conn:
+                conn.execute("INSERT INTO categories (name) VALUES ('Cache Raced')")
+            conn.close()
+            server.invalidate_categories_cache()
+
+        with mock.patch.object(server, 'get_db_cursor', racing_cursor):
+            self.assertNotIn('Cache Raced', self.names())
+
+        self.assertIn('Cache Raced', self.names())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import io
+import sqlite3
+import unittest
+
+import pandas as pd
+
+from tests.support import load_servers
+
+
+def sheet(*words):
+    """An in-memory .xlsx upload with one row per word"""
+    buf = io.BytesIO()
+    pd.DataFrame([
+        {'Word': word, 'Meaning Bangla': 'b', 'Meaning English': meaning, 'Synonyms': 's',
+         'Example Sentence': 'x', 'Category': 'General Vocabulary'}
+        for word, meaning in words
+    ]).to_excel(buf, index=False)
+    buf.seek(0)
+    return buf
+
+
+class ImportUpsertTests:
+    """Both apps import with one upsert; soft-deleted words come back as new words"""
+
+    device_id = None
+
+    def client(self):
+        raise NotImplementedError
+
+    def import_words(self, *words):
+        response = self.client().post('/api/import_excel', data={
+            'file': (sheet(*words), 'words.xlsx'), 'device_id': self.device_id
+        }, content_type='multipart/form-data')
+        self.assertEqual(response.status_code, 200)
+
+    def row(self, word):
+        with sqlite3.connect('vocabulary.db') as conn:
+            row = conn.execute('''
+                SELECT meaning_english, date_added, is_deleted, is_edited FROM words
+                WHERE word = ? AND device_id = ?
+            ''', (word, self.device_id)).fetchone()
+        conn.close()
+        return row
+
+    def test_live_word_is_edited_in_place(self):
+        self.import_words(('import live', 'first'))
+        date_added = self.row('Import Live')[1]
+
+        self.import_words(('import live', 'second'))
+
+        self.assertEqual(self.row('Import Live'), ('second', date_added, 0, 1))
+
+    def test_deleted_word_is_added_again_as_new(self):
+        self.import_words(('import deleted', 'first'))
+        with sqlite3.connect('vocabulary.db') as conn:
+            conn.execute('''
+                UPDATE words SET is_deleted = 1, date_added = '2000-01-01T00:00:00'
+                WHERE word = 'Import Deleted' AND device_id = ?
+            ''', (self.device_id,))
+        conn.close()
+
+        self.import_words(('import deleted', 'second'))
+
+        meaning, date_added, is_deleted, is_edited = self.row('Import Deleted')
+        self.assertEqual((meaning, is_deleted, is_edited), ('second', 0, 0))
+        self.assertNotEqual(date_added, '2000-01-01T00:00:00')
+
+
+class ServerImportTest(ImportUpsertTests, unittest.TestCase):
+    device_id = 'import-test-server'
+
+    def client(self):
+        server, _ = load_servers()
+        return server.app.test_client()
+
+
+class ApiServerImportTest(ImportUpsertTests, unittest.TestCase):
+    device_id = 'import-test-api'
+
+    def client(self):
+        _, api_server = load_servers()
+        return api_server.app.test_client()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from tests.support import load_servers
+
+
+def save_quiz(client, device_id):
+    response = client.post('/api/save_quiz_result', json={
+        'device_id': device_id, 'score': 7, 'total_questions': 10, 'time_taken_seconds': 30
+    })
+    assert response.status_code == 200, response.get_data()
+
+
+def statistics(client, device_id):
+    response = client.get(f'/api/quiz_statistics?device_id={device_id}')
+    assert response.status_code == 200, response.get_data()
+    return response.get_json()['statistics']
+
+
+class SharedDailyCounterTest(unittest.TestCase):
+    """Both apps write vocabulary.db, so each must count the other's quizzes"""
+
+    def setUp(self):
+        server, api_server = load_servers()
+        self.root = server.app.test_client()
+        self.api = api_server.app.test_client()
+
+    def test_api_quizzes_counted_by_root_server(self):
+        save_quiz(self.api, 'counter-api')
+        save_quiz(self.api, 'counter-api')
+
+        stats = statistics(self.root, 'counter-api')
+        self.assertEqual(stats['total_quizzes'], 2)
+        self.assertEqual(stats['quizzes_today'], 2)
+
+    def test_root_quizzes_counted_by_api_server(self):
+        save_quiz(self.root, 'counter-root')
+
+        stats = statistics(self.api, 'counter-root')
+        self.assertEqual(stats['total_quizzes'], 1)
+        self.assertEqual(stats['quizzes_today'], 1)
+
+    def test_mixed_saves_share_one_count(self):
+        save_quiz(self.root, 'counter-mixed')
+        save_quiz(self.api, 'counter-mixed')
+
+        self.assertEqual(statistics(self.root, 'counter-mixed')['quizzes_today'], 2)
+        self.assertEqual(statistics(self.api, 'counter-mixed')['quizzes_today'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import json
+import sqlite3
+import unittest
+
+from tests.support import load_servers
+
+
+class CorruptWordListTest(unittest.TestCase):
+    """A quiz row whose stored word list is not JSON must not break the listing"""
+
+    @classmethod
+    def setUpClass(cls):
+        load_servers()
+        with sqlite3.connect('vocabulary.db') as conn:
+            conn.execute('''
+                INSERT INTO quiz_results
+                (device_id, quiz_type, score, total_questions, accuracy,
+                 time_taken_seconds, correct_words, incorrect_words, details, timestamp)
+                VALUES ('corrupt-words', 'multiple_choice', 3, 5, 60.0, 20, 'not json', '["kept"]', '{}',
+                        '2024-01-01T10:00:00')
+            ''')
+        conn.close()
+
+    def setUp(self):
+        server, api_server = load_servers()
+        self.root = server.app.test_client()
+        self.api = api_server.app.test_client()
+
+    def assert_listing_survives(self, response):
+        self.assertEqual(response.status_code, 200)
+        # Parse the raw body: an embedded non-JSON value would fail here
+        results = json.loads(response.get_data())['results']
+        row = next(r for r in results if r['score'] == 3 and r['incorrect_words'] == ['kept'])
+        self.assertEqual(row['correct_words'], [])
+
+    def test_root_server_device_listing(self):
+        self.assert_listing_survives(self.root.get('/api/quiz_results?device_id=corrupt-words'))
+
+    def test_root_server_all_devices_listing(self):
+        self.assert_listing_survives(self.root.get('/api/quiz_results?show_all=true&limit=1000'))
+
+    def test_api_server_device_listing(self):
+        self.assert_listing_survives(self.api.get('/api/quiz_results?device_id=corrupt-words'))
+
+
+if __name__ == '__main__':
+    unittest.main()